@@ -0,0 +1,206 @@
+"""Async handlers for the hottest endpoints.
+
+Enabled with ``ASYNC_DB_ENABLED``. ``main`` registers this router before its
+own routes, so these handlers take precedence over the sync versions of the
+same paths. They run on the event loop with an ``AsyncSession`` (aiosqlite or
+asyncpg) instead of occupying a threadpool worker per request. GET handlers,
+like their sync versions, use the read-only session, which is never
+committed.
+
+Async sessions cannot lazy-load, so every relationship a response touches is
+loaded eagerly. Summary maintenance reuses the sync ``DailySummaryService``
+through ``AsyncSession.run_sync``.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from typing import List, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
+
+from . import models, schemas
+from .dependencies import get_async_db, get_async_read_db, get_current_user_async, get_current_user_async_readonly
+from .services.daily_summary import DailySummaryService, NutritionTotals
+from .services.food_search import (
+    build_search_response,
+    custom_food_entry,
+    custom_foods_statement,
+    record_food_searches,
+    usda_search_entries,
+)
+from .services.meals import build_meal
+
+router = APIRouter()
+
+
+def _meal_tree_statement() -> Select:
+    return select(models.Meal).options(
+        selectinload(models.Meal.items).selectinload(models.MealItem.food_entries)
+    )
+
+
+async def _get_owned_meal(db: AsyncSession, meal_id: int, user_id: int) -> models.Meal:
+    meal = (
+        await db.execute(
+            _meal_tree_statement().where(models.Meal.id == meal_id, models.Meal.user_id == user_id)
+        )
+    ).scalar_one_or_none()
+    if meal is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meal not found")
+    return meal
+
+
+def _find_item(meal: models.Meal, item_id: int) -> models.MealItem:
+    for item in meal.items:
+        if item.id == item_id:
+            return item
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meal item not found")
+
+
+async def _apply_summary_delta(
+    db: AsyncSession, user: models.User, date: dt.date, delta: NutritionTotals
+) -> None:
+    await db.run_sync(lambda session: DailySummaryService(session).apply_delta(user, date, delta))
+
+
+@router.get("/dashboard", response_model=schemas.DashboardResponse)
+async def get_dashboard(
+    date: Optional[dt.date] = None,
+    current_user: models.User = Depends(get_current_user_async_readonly),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    target_date = date or dt.date.today()
+    meals: List[models.Meal] = list(
+        (
+            await db.execute(
+                _meal_tree_statement()
+                .where(models.Meal.user_id == current_user.id, models.Meal.date == target_date)
+                .order_by(models.Meal.id.desc())
+            )
+        ).scalars()
+    )
+    summary = await db.run_sync(
+        lambda session: DailySummaryService(session).get(current_user, target_date)
+    )
+    return schemas.DashboardResponse(user=current_user, meals=meals, summary=summary)
+
+
+@router.get("/foods/search", response_model=schemas.FoodSearchResponse)
+async def search_foods(
+    query: str,
+    background_tasks: BackgroundTasks,
+    limit: int = 10,
+    current_user: models.User = Depends(get_current_user_async_readonly),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    normalized_query = query.strip()
+    if len(normalized_query) < 2:
+        return schemas.FoodSearchResponse(query=normalized_query, results=[])
+
+    limit = max(1, min(limit, 25))
+    # The parquet search is CPU-bound pandas work; keep it off the event loop.
+    response_entries = await run_in_threadpool(usda_search_entries, normalized_query, limit)
+
+    custom_items: List[models.FoodItem] = []
+    if len(response_entries) < limit:
+        remaining = limit - len(response_entries)
+        custom_items = list(
+            (await db.execute(custom_foods_statement(normalized_query, current_user.id, remaining))).scalars()
+        )
+        response_entries.extend(custom_food_entry(item) for item in custom_items)
+
+    background_tasks.add_task(record_food_searches, [item.id for item in custom_items])
+    return build_search_response(normalized_query, response_entries, limit)
+
+
+@router.post("/meals", response_model=schemas.MealOut, status_code=status.HTTP_201_CREATED)
+async def create_meal(
+    meal_in: schemas.MealCreate,
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    meal_date = meal_in.date or dt.date.today()
+    meal = build_meal(meal_in, current_user.id, meal_date)
+    db.add(meal)
+    await db.flush()
+    await _apply_summary_delta(db, current_user, meal_date, NutritionTotals.from_meal(meal))
+    return meal
+
+
+@router.patch("/meals/{meal_id}", response_model=schemas.MealOut)
+async def update_meal(
+    meal_id: int,
+    meal_update: schemas.MealUpdate,
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    meal = await _get_owned_meal(db, meal_id, current_user.id)
+    old_date = meal.date
+
+    if meal_update.name is not None:
+        meal.name = meal_update.name
+    if meal_update.date is not None:
+        meal.date = meal_update.date
+    await db.flush()
+
+    if meal_update.date is not None and meal_update.date != old_date:
+        moved = NutritionTotals.from_meal(meal)
+        await _apply_summary_delta(db, current_user, old_date, -moved)
+        await _apply_summary_delta(db, current_user, meal.date, moved)
+    return meal
+
+
+@router.delete("/meals/{meal_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_meal(
+    meal_id: int,
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    meal = await _get_owned_meal(db, meal_id, current_user.id)
+    meal_date = meal.date
+    removed = NutritionTotals.from_meal(meal)
+    await db.delete(meal)
+    await db.flush()
+    await _apply_summary_delta(db, current_user, meal_date, -removed)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.patch("/meals/{meal_id}/items/{item_id}", response_model=schemas.MealItemOut)
+async def update_meal_item(
+    meal_id: int,
+    item_id: int,
+    item_update: schemas.MealItemUpdate,
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    meal = await _get_owned_meal(db, meal_id, current_user.id)
+    meal_item = _find_item(meal, item_id)
+
+    if item_update.name is not None:
+        meal_item.name = item_update.name
+    if item_update.quantity is not None:
+        meal_item.quantity = item_update.quantity
+    await db.flush()
+    return meal_item
+
+
+@router.delete("/meals/{meal_id}/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_meal_item(
+    meal_id: int,
+    item_id: int,
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    meal = await _get_owned_meal(db, meal_id, current_user.id)
+    meal_item = _find_item(meal, item_id)
+    meal_date = meal.date
+    removed = NutritionTotals.from_item(meal_item)
+    await db.delete(meal_item)
+    await db.flush()
+    await _apply_summary_delta(db, current_user, meal_date, -removed)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,21 +1,28 @@
 from __future__ import annotations
 
+import base64
 import datetime as dt
+import hashlib
+import hmac
+import secrets
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
-from . import models
-
-pwd_context = CryptContext(
-    schemes=["bcrypt", "bcrypt_sha256"],
-    deprecated="auto",
-    bcrypt_sha256__deprecated=True,
-)
+from . import config, models
+from .services.password_hashing import pwd_context
 
 
+# Blocking variants; request handlers use the process pool in
+# ``services.password_hashing`` instead.
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -25,24 +32,338 @@ def verify_password(password: str, password_hash: str) -> bool:
 
 
 def create_session_for_user(db: Session, user: models.User) -> models.SessionToken:
-    token = str(uuid.uuid4())
-    session = models.SessionToken(token=token, user=user)
+    now = dt.datetime.utcnow()
+    session = models.SessionToken(
+        token=str(uuid.uuid4()),
+        user=user,
+        created_at=now,
+        expires_at=now + dt.timedelta(days=config.SESSION_TTL_DAYS),
+    )
     db.add(session)
     db.flush()
+    _evict_oldest_sessions(db, user.id)
     return session
 
 
+def _evict_oldest_sessions(db: Session, user_id: int) -> None:
+    """Delete the user's sessions beyond ``SESSION_MAX_PER_USER``, oldest first."""
+
+    if config.SESSION_MAX_PER_USER <= 0:
+        return
+    stale = db.execute(
+        select(models.SessionToken.id, models.SessionToken.token)
+        .where(models.SessionToken.user_id == user_id)
+        .order_by(models.SessionToken.created_at.desc(), models.SessionToken.id.desc())
+        .offset(config.SESSION_MAX_PER_USER)
+    ).all()
+    if not stale:
+        return
+    db.query(models.SessionToken).filter(
+        models.SessionToken.id.in_([session_id for session_id, _ in stale])
+    ).delete(synchronize_session=False)
+    for _, token in stale:
+        invalidate_token(token)
+
+
+def delete_expired_tokens(db: Session, model, batch_size: int) -> int:
+    """Delete up to *batch_size* expired rows of ``SessionToken`` or ``RevokedToken``.
+
+    Expired tokens are already rejected on lookup (cached ones too, since
+    the cache keeps the expiry), so only the rows need to go.
+    """
+
+    expired_ids = (
+        db.execute(
+            select(model.id).where(model.expires_at < dt.datetime.utcnow()).order_by(model.id).limit(batch_size)
+        )
+        .scalars()
+        .all()
+    )
+    if not expired_ids:
+        return 0
+    return db.query(model).filter(model.id.in_(expired_ids)).delete(synchronize_session=False)
+
+
+def issue_session_token(db: Session, user: models.User) -> str:
+    """New session token for *user* in the configured ``SESSION_TOKEN_FORMAT``."""
+
+    if config.SESSION_TOKEN_FORMAT == "signed":
+        return create_signed_token(user.id)
+    return create_session_for_user(db, user).token
+
+
+def revoke_session_token(db: Session, token: str) -> None:
+    """Log out *token*: delete an opaque session or record a signed token as revoked."""
+
+    if is_signed_token(token):
+        claims = decode_signed_token(token)
+        if claims is not None:
+            _insert_revoked_token(db, claims)
+            revocations.add(claims.jti, claims.expires_at)
+        return
+
+    db.query(models.SessionToken).filter(models.SessionToken.token == token).delete(
+        synchronize_session=False
+    )
+    invalidate_token(token)
+
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _insert_revoked_token(db: Session, claims: "SignedTokenClaims") -> None:
+    # Two concurrent logouts with the same token must not fail on the unique jti.
+    values = {"jti": claims.jti, "user_id": claims.user_id, "expires_at": claims.expires_at}
+    dialect = db.get_bind().dialect.name
+    if dialect not in _UPSERT_INSERTS:
+        if db.query(models.RevokedToken.id).filter(models.RevokedToken.jti == claims.jti).first() is None:
+            db.add(models.RevokedToken(**values))
+            db.flush()
+        return
+    db.execute(
+        _UPSERT_INSERTS[dialect](models.RevokedToken)
+        .values(revoked_at=dt.datetime.utcnow(), **values)
+        .on_conflict_do_nothing(index_elements=["jti"])
+    )
+
+
+# ----------------------------------------------------------------------
+# Signed session tokens
+#
+# Format: ``s1.<user_id>.<issued_at>.<expires_at>.<jti>.<signature>`` where
+# the timestamps are Unix seconds and the signature is an HMAC-SHA256 of
+# everything before it, keyed with SESSION_SECRET. Validation needs no
+# database access; only logouts before expiry are tracked, in
+# ``revoked_tokens``, and each process keeps those jtis in memory.
+
+SIGNED_TOKEN_PREFIX = "s1."
+
+if config.SESSION_TOKEN_FORMAT not in ("opaque", "signed"):
+    raise RuntimeError(f"Unknown SESSION_TOKEN_FORMAT {config.SESSION_TOKEN_FORMAT!r}")
+if config.SESSION_TOKEN_FORMAT == "signed" and not config.SESSION_SECRET:
+    raise RuntimeError("SESSION_SECRET must be set when SESSION_TOKEN_FORMAT=signed")
+
+
+@dataclass(frozen=True)
+class SignedTokenClaims:
+    user_id: int
+    issued_at: dt.datetime
+    expires_at: dt.datetime
+    jti: str
+
+
+def is_signed_token(token: str) -> bool:
+    return token.startswith(SIGNED_TOKEN_PREFIX)
+
+
+def _signature(payload: str) -> str:
+    digest = hmac.new(config.SESSION_SECRET.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode("ascii").rstrip("=")
+
+
+def create_signed_token(user_id: int) -> str:
+    issued_at = int(time.time())
+    expires_at = issued_at + config.SESSION_TTL_DAYS * 86400
+    payload = f"{SIGNED_TOKEN_PREFIX}{user_id}.{issued_at}.{expires_at}.{secrets.token_hex(16)}"
+    return f"{payload}.{_signature(payload)}"
+
+
+def decode_signed_token(token: str) -> Optional[SignedTokenClaims]:
+    """Claims of a valid, unexpired and unrevoked signed token, else ``None``."""
+
+    # compare_digest and the ASCII payload encoding both reject other characters.
+    if not config.SESSION_SECRET or not is_signed_token(token) or not token.isascii():
+        return None
+    payload, _, signature = token.rpartition(".")
+    if not hmac.compare_digest(signature, _signature(payload)):
+        return None
+    try:
+        user_id, issued_at, expires_at, jti = payload[len(SIGNED_TOKEN_PREFIX):].split(".")
+        claims = SignedTokenClaims(
+            user_id=int(user_id),
+            issued_at=dt.datetime.utcfromtimestamp(int(issued_at)),
+            expires_at=dt.datetime.utcfromtimestamp(int(expires_at)),
+            jti=jti,
+        )
+    except ValueError:
+        return None
+    if _is_expired(claims.expires_at) or revocations.is_revoked(claims.jti):
+        return None
+    return claims
+
+
+class RevocationList:
+    """In-memory copy of ``revoked_tokens`` rows whose tokens have not expired yet."""
+
+    OVERLAP = dt.timedelta(seconds=60)
+
+    def __init__(self):
+        self._revoked: Dict[str, dt.datetime] = {}
+        self._loaded_until: Optional[dt.datetime] = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def add(self, jti: str, expires_at: dt.datetime) -> None:
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def refresh(self, db: Session) -> int:
+        """Load revocations recorded since the last refresh and drop expired ones."""
+
+        now = dt.datetime.utcnow()
+        query = db.query(
+            models.RevokedToken.jti, models.RevokedToken.expires_at, models.RevokedToken.revoked_at
+        ).filter(models.RevokedToken.expires_at > now)
+        if self._loaded_until is not None:
+            # Overlap the previous window so rows committed slightly late are not skipped.
+            query = query.filter(models.RevokedToken.revoked_at >= self._loaded_until - self.OVERLAP)
+        rows = query.all()
+        with self._lock:
+            for jti, expires_at, revoked_at in rows:
+                self._revoked[jti] = expires_at
+                if self._loaded_until is None or revoked_at > self._loaded_until:
+                    self._loaded_until = revoked_at
+            for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+                del self._revoked[jti]
+        return len(rows)
+
+
+revocations = RevocationList()
+
+
+class TokenCache:
+    """TTL-bounded LRU of session token -> (user_id, expires_at).
+
+    Only the token lookup is cached; the user row is still loaded into the
+    request's session (a primary-key get) so handlers can modify it. Each
+    API process has its own cache, so a logout on another node takes
+    effect here within ``ttl_seconds``.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[int, Optional[dt.datetime], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, token: str) -> Optional[Tuple[int, Optional[dt.datetime]]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user_id, expires_at, cached_until = entry
+            if cached_until < time.monotonic():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user_id, expires_at
+
+    def put(self, token: str, user_id: int, expires_at: Optional[dt.datetime]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[token] = (user_id, expires_at, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in [token for token, entry in self._entries.items() if entry[0] == user_id]:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(config.AUTH_TOKEN_CACHE_SIZE, config.AUTH_TOKEN_CACHE_TTL_SECONDS)
+
+
+def invalidate_token(token: str) -> None:
+    """Drop *token* from the cache (logout)."""
+
+    token_cache.invalidate(token)
+
+
+def invalidate_user_tokens(user_id: int) -> None:
+    """Drop every cached token of *user_id* (profile and account changes)."""
+
+    token_cache.invalidate_user(user_id)
+
+
+def _token_lookup_statement(token: str):
+    # ``token`` is unique, so no ordering is needed to pick the row.
+    return (
+        select(models.User, models.SessionToken.expires_at)
+        .join(models.SessionToken, models.SessionToken.user_id == models.User.id)
+        .where(models.SessionToken.token == token)
+    )
+
+
+def _is_expired(expires_at: Optional[dt.datetime]) -> bool:
+    return expires_at is not None and expires_at < dt.datetime.utcnow()
+
+
 def get_user_by_token(db: Session, token: str) -> Optional[models.User]:
     if not token:
         return None
-    session = (
-        db.query(models.SessionToken)
-        .filter(models.SessionToken.token == token)
-        .order_by(models.SessionToken.created_at.desc())
-        .first()
-    )
-    if session is None:
+    if is_signed_token(token):
+        claims = decode_signed_token(token)
+        return db.get(models.User, claims.user_id) if claims is not None else None
+
+    cached = token_cache.get(token)
+    if cached is not None:
+        user_id, expires_at = cached
+        user = None if _is_expired(expires_at) else db.get(models.User, user_id)
+        if user is None:
+            token_cache.invalidate(token)
+        return user
+
+    row = db.execute(_token_lookup_statement(token)).first()
+    if row is None:
+        return None
+    user, expires_at = row
+    if _is_expired(expires_at):
+        return None
+    token_cache.put(token, user.id, expires_at)
+    return user
+
+
+async def get_user_by_token_async(db: AsyncSession, token: str) -> Optional[models.User]:
+    """Async variant of :func:`get_user_by_token`, sharing its cache."""
+
+    if not token:
+        return None
+    if is_signed_token(token):
+        claims = decode_signed_token(token)
+        return await db.get(models.User, claims.user_id) if claims is not None else None
+
+    cached = token_cache.get(token)
+    if cached is not None:
+        user_id, expires_at = cached
+        user = None if _is_expired(expires_at) else await db.get(models.User, user_id)
+        if user is None:
+            token_cache.invalidate(token)
+        return user
+
+    row = (await db.execute(_token_lookup_statement(token))).first()
+    if row is None:
         return None
-    if session.expires_at and session.expires_at < dt.datetime.utcnow():
+    user, expires_at = row
+    if _is_expired(expires_at):
         return None
-    return session.user
+    token_cache.put(token, user.id, expires_at)
+    return user
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+_TASKS: List[asyncio.Task] = []
+
+
+async def _run_periodically(name: str, interval_seconds: float, func: Callable[[], object]) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await loop.run_in_executor(None, func)
+        except Exception:  # pragma: no cover - keep the loop alive
+            logger.exception("Background job %s failed", name)
+
+
+def start_periodic_job(name: str, interval_seconds: float, func: Callable[[], object]) -> asyncio.Task:
+    """Run blocking *func* every *interval_seconds* on the default executor."""
+
+    task = asyncio.get_running_loop().create_task(
+        _run_periodically(name, interval_seconds, func), name=name
+    )
+    _TASKS.append(task)
+    return task
+
+
+async def stop_periodic_jobs() -> None:
+    tasks = list(_TASKS)
+    _TASKS.clear()
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
@@ -1,24 +1,141 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional
 
 from pathlib import Path
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+from . import config
 
 # database.py is at backend/app/database.py
 # So parents[1] = backend/, parents[0] = backend/app/
 BACKEND_ROOT = Path(__file__).resolve().parents[1]
 # Use .as_posix() to ensure forward slashes on Windows
-DATABASE_URL = f"sqlite:///{(BACKEND_ROOT / 'app.db').as_posix()}"
+DEFAULT_DATABASE_URL = f"sqlite:///{(BACKEND_ROOT / 'app.db').as_posix()}"
+
+# Async driver used for each backend when ``ASYNC_DB_ENABLED`` is set.
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def normalize_database_url(raw_url: str) -> URL:
+    url = make_url(raw_url)
+    # Heroku-style ``postgres://`` URLs are not recognised by SQLAlchemy.
+    if url.drivername == "postgres":
+        url = url.set(drivername="postgresql")
+    return url
+
+
+def async_database_url(url: URL) -> URL:
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r} databases")
+    return url.set(drivername=_ASYNC_DRIVERS[backend])
+
+
+DATABASE_URL = normalize_database_url(config.DATABASE_URL or DEFAULT_DATABASE_URL)
+IS_SQLITE = DATABASE_URL.get_backend_name() == "sqlite"
+
+
+def sqlite_pragmas() -> List[str]:
+    """PRAGMA statements built from the ``SQLITE_*`` settings."""
+
+    pragmas: List[str] = []
+    if config.SQLITE_JOURNAL_MODE:
+        pragmas.append(f"PRAGMA journal_mode = {config.SQLITE_JOURNAL_MODE}")
+    if config.SQLITE_SYNCHRONOUS:
+        pragmas.append(f"PRAGMA synchronous = {config.SQLITE_SYNCHRONOUS}")
+    # A negative cache_size is measured in KiB rather than pages.
+    pragmas.append(f"PRAGMA cache_size = {-abs(config.SQLITE_CACHE_SIZE_KIB)}")
+    pragmas.append(f"PRAGMA mmap_size = {config.SQLITE_MMAP_SIZE_BYTES}")
+    if config.SQLITE_TEMP_STORE:
+        pragmas.append(f"PRAGMA temp_store = {config.SQLITE_TEMP_STORE}")
+    return pragmas
+
+
+def configure_sqlite_engine(target: Engine, pragmas: Optional[List[str]] = None) -> None:
+    """Run *pragmas* (default: :func:`sqlite_pragmas`) on every new connection."""
+
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+
+    @event.listens_for(target, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}, future=True, echo=False
-)
+def _is_memory_sqlite(url: URL) -> bool:
+    database = url.database or ""
+    return database in ("", ":memory:") or url.query.get("mode") == "memory"
+
+
+def engine_options(url: URL, is_async: bool = False) -> Dict[str, Any]:
+    """Connection and pool arguments for *url*'s backend."""
+
+    options: Dict[str, Any] = {"echo": False}
+    pooled = not (url.get_backend_name() == "sqlite" and _is_memory_sqlite(url))
+    if pooled:
+        options["pool_size"] = config.DB_POOL_SIZE
+        options["max_overflow"] = config.DB_MAX_OVERFLOW
+        options["pool_timeout"] = config.DB_POOL_TIMEOUT_SECONDS
+    else:
+        # An in-memory database lives in one connection; share it across
+        # threads instead of sizing a pool (which would open empty databases).
+        options["poolclass"] = StaticPool
+    if url.get_backend_name() == "sqlite":
+        # sqlite3's ``timeout`` is the busy timeout: wait for the lock instead of failing.
+        connect_args: Dict[str, Any] = {"timeout": config.SQLITE_BUSY_TIMEOUT_MS / 1000.0}
+        if not is_async:
+            connect_args["check_same_thread"] = False
+        options["connect_args"] = connect_args
+    else:
+        options["pool_pre_ping"] = config.DB_POOL_PRE_PING
+        options["pool_recycle"] = config.DB_POOL_RECYCLE_SECONDS
+    if is_async and pooled:
+        options["poolclass"] = AsyncAdaptedQueuePool
+    return options
+
+
+engine = create_engine(DATABASE_URL, future=True, **engine_options(DATABASE_URL))
+if IS_SQLITE:
+    configure_sqlite_engine(engine)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+
+def _create_read_engine() -> Engine:
+    """Engine for read-only sessions.
+
+    A configured replica (``DATABASE_READ_URL``) is used as is. On SQLite a
+    second pool on the same file opens its connections with ``query_only``,
+    so GET handlers never take the write lock; in WAL mode they also never
+    wait for it. Other databases without a replica share the primary engine.
+    """
+
+    if config.DATABASE_READ_URL:
+        url = normalize_database_url(config.DATABASE_READ_URL)
+    elif IS_SQLITE and not _is_memory_sqlite(DATABASE_URL):
+        url = DATABASE_URL
+    else:
+        return engine
+
+    read_engine = create_engine(url, future=True, **engine_options(url))
+    if url.get_backend_name() == "sqlite":
+        configure_sqlite_engine(read_engine, sqlite_pragmas() + ["PRAGMA query_only = ON"])
+    return read_engine
+
+
+read_engine = _create_read_engine()
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False, future=True)
+
 Base = declarative_base()
 
 
@@ -33,3 +150,94 @@ def get_session() -> Generator[Session, None, None]:
         raise
     finally:
         session.close()
+
+
+@contextmanager
+def get_read_session() -> Generator[Session, None, None]:
+    """Session for read-only requests; it is always rolled back, never committed."""
+
+    session: Session = ReadSessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
+_async_read_engine: Optional[AsyncEngine] = None
+_AsyncReadSessionLocal: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """Create the async engine on first use so the async driver stays optional."""
+
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        url = async_database_url(DATABASE_URL)
+        _async_engine = create_async_engine(url, **engine_options(url, is_async=True))
+        if IS_SQLITE:
+            configure_sqlite_engine(_async_engine.sync_engine)
+        # Handlers serialize ORM objects after commit, and async sessions cannot lazy-load.
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=_async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+def get_async_read_engine() -> AsyncEngine:
+    """Async counterpart of ``read_engine``: a replica, a ``query_only`` SQLite pool, or the primary."""
+
+    global _async_read_engine, _AsyncReadSessionLocal
+    if _async_read_engine is None:
+        if config.DATABASE_READ_URL:
+            url = async_database_url(normalize_database_url(config.DATABASE_READ_URL))
+        elif IS_SQLITE and not _is_memory_sqlite(DATABASE_URL):
+            url = async_database_url(DATABASE_URL)
+        else:
+            url = None
+
+        if url is None:
+            read_engine = get_async_engine()
+        else:
+            read_engine = create_async_engine(url, **engine_options(url, is_async=True))
+            if url.get_backend_name() == "sqlite":
+                configure_sqlite_engine(read_engine.sync_engine, sqlite_pragmas() + ["PRAGMA query_only = ON"])
+        _AsyncReadSessionLocal = async_sessionmaker(bind=read_engine, autoflush=False, expire_on_commit=False)
+        _async_read_engine = read_engine
+    return _async_read_engine
+
+
+@asynccontextmanager
+async def get_async_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Async session for read-only requests; it is always rolled back, never committed."""
+
+    get_async_read_engine()
+    session: AsyncSession = _AsyncReadSessionLocal()
+    try:
+        yield session
+    finally:
+        await session.rollback()
+        await session.close()
+
+
+@asynccontextmanager
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    get_async_engine()
+    session: AsyncSession = _AsyncSessionLocal()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+async def dispose_async_engine() -> None:
+    if _async_read_engine is not None and _async_read_engine is not _async_engine:
+        await _async_read_engine.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from fastapi import Cookie, Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import AsyncGenerator, Optional
 
 from . import auth, models
-from .database import get_session
+from .database import get_async_read_session, get_async_session, get_read_session, get_session
 
 
 def get_db() -> Session:
@@ -13,6 +14,21 @@ def get_db() -> Session:
         yield session
 
 
+def get_read_db() -> Session:
+    with get_read_session() as session:
+        yield session
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_session() as session:
+        yield session
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_read_session() as session:
+        yield session
+
+
 async def get_token(
     authorization: Optional[str] = Header(default=None), session_token: Optional[str] = Cookie(default=None)
 ) -> str:
@@ -28,3 +44,34 @@ async def get_current_user(token: str = Depends(get_token), db: Session = Depend
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session token")
     return user
+
+
+async def get_current_user_readonly(
+    token: str = Depends(get_token), db: Session = Depends(get_read_db)
+) -> models.User:
+    """Like :func:`get_current_user`, but resolved on the read-only session of GET handlers."""
+
+    user = auth.get_user_by_token(db, token)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session token")
+    return user
+
+
+async def get_current_user_async(
+    token: str = Depends(get_token), db: AsyncSession = Depends(get_async_db)
+) -> models.User:
+    user = await auth.get_user_by_token_async(db, token)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session token")
+    return user
+
+
+async def get_current_user_async_readonly(
+    token: str = Depends(get_token), db: AsyncSession = Depends(get_async_read_db)
+) -> models.User:
+    """Like :func:`get_current_user_async`, but resolved on the read-only session of async GET handlers."""
+
+    user = await auth.get_user_by_token_async(db, token)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session token")
+    return user
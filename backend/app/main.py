@@ -4,28 +4,50 @@ import asyncio
 import datetime as dt
 import logging
 import uuid
-import math
 from typing import Any, Dict, List, Optional, Tuple
 
 import os
 
-from fastapi import Depends, FastAPI, File, HTTPException, Response, UploadFile, status
+from fastapi import BackgroundTasks, Depends, FastAPI, File, HTTPException, Response, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import or_, select
-from sqlalchemy.orm import Session
-
-from . import auth, models, schemas
-from .database import Base, engine
-from .dependencies import get_current_user, get_db, get_token
-from .services.motivation import MotivationMessageService
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, selectinload
+
+from . import async_routes, auth, config, models, schemas
+from .background import start_periodic_job, stop_periodic_jobs
+from .database import dispose_async_engine, get_read_session, get_session
+from .dependencies import get_current_user, get_current_user_readonly, get_db, get_read_db, get_token
+from .migrations import run_migrations
+from .pagination import NEXT_CURSOR_HEADER, paginate_by_date
+from .services.bodyfat_batcher import bodyfat_batcher
+from .services.bodyfat_inference import BodyFatMetadata
+from .services.bodyfat_jobs import PENDING as BODY_FAT_PENDING, bodyfat_jobs
+from .services.change_feed import ChangeFeedService
+from .services.daily_summary import DailySummaryService, NutritionTotals, reconcile_summaries
+from .services.food_search import (
+    build_search_response,
+    custom_food_entry,
+    custom_foods_statement,
+    record_food_searches,
+    usda_search_entries,
+)
+from .services.meals import build_meal
+from .services.password_hashing import hash_password_async, password_hasher, verify_password_async
+from .services.sync import MAX_SYNC_OPERATIONS, SyncService
+from .services.uploads import UnsupportedImageType, UploadSizeLimitMiddleware, UploadTooLarge, save_image_upload
 from .services.usda_db import (
-    search_usda_foods,
     get_usda_food_detail,
     get_usda_gold_macros,
     preload_usda_gold,
 )
-from .services.exercise_db import search_exercises, calculate_calories_burned, get_categories
+from .services.exercise_db import (
+    calculate_calories_burned,
+    estimate_workout_calories,
+    get_categories,
+    search_exercises,
+)
 
 
 def calculate_bmr(height_cm: Optional[float], weight_kg: Optional[float], age: Optional[int], gender: Optional[str]) -> Optional[float]:
@@ -122,18 +144,113 @@ def calculate_fat_loss(tdee: Optional[float], total_calories: float) -> float:
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(title="From Fat To Fit API", version="0.1.0")
 
+if config.ASYNC_DB_ENABLED:
+    # 아래 동기 라우트보다 먼저 등록해야 같은 경로에서 async 핸들러가 우선한다.
+    app.include_router(async_routes.router)
+
 logger = logging.getLogger(__name__)
 
+
+@app.on_event("startup")
+async def _apply_migrations() -> None:
+    if config.RUN_MIGRATIONS_ON_STARTUP:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, run_migrations)
+
+
 # Preload USDA gold table at startup so first autocomplete is fast
 @app.on_event("startup")
 async def _preload_usda_gold() -> None:
     loop = asyncio.get_running_loop()
     await loop.run_in_executor(None, preload_usda_gold)
 
+
+def _reconcile_recent_summaries() -> None:
+    with get_session() as session:
+        corrected = reconcile_summaries(session, config.SUMMARY_RECONCILE_LOOKBACK_DAYS)
+    if corrected:
+        logger.info("Summary reconciler corrected %d daily summaries", corrected)
+
+
+@app.on_event("startup")
+async def _start_summary_reconciler() -> None:
+    if config.SUMMARY_RECONCILE_ENABLED:
+        start_periodic_job(
+            "summary-reconciler",
+            config.SUMMARY_RECONCILE_INTERVAL_SECONDS,
+            _reconcile_recent_summaries,
+        )
+
+
+def _delete_expired_tokens() -> None:
+    # 배치마다 커밋해 쓰기 잠금을 오래 잡지 않는다
+    batch_size = config.SESSION_CLEANUP_BATCH_SIZE
+    for model in (models.SessionToken, models.RevokedToken):
+        total = 0
+        while True:
+            with get_session() as session:
+                deleted = auth.delete_expired_tokens(session, model, batch_size)
+            total += deleted
+            if deleted < batch_size:
+                break
+        if total:
+            logger.info("Deleted %d expired rows from %s", total, model.__tablename__)
+
+
+@app.on_event("startup")
+async def _start_session_cleanup() -> None:
+    if config.SESSION_CLEANUP_ENABLED:
+        start_periodic_job(
+            "expired-sessions-cleanup",
+            config.SESSION_CLEANUP_INTERVAL_SECONDS,
+            _delete_expired_tokens,
+        )
+
+
+def _refresh_revoked_tokens() -> None:
+    with get_read_session() as session:
+        auth.revocations.refresh(session)
+
+
+@app.on_event("startup")
+async def _start_revocation_refresh() -> None:
+    # 서명 토큰을 검증할 수 있을 때만 필요 (다른 노드의 로그아웃 반영)
+    if config.SESSION_SECRET:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _refresh_revoked_tokens)
+        start_periodic_job(
+            "revoked-tokens-refresh",
+            config.REVOKED_TOKENS_REFRESH_SECONDS,
+            _refresh_revoked_tokens,
+        )
+
+
+@app.on_event("startup")
+async def _start_password_hashing_stats() -> None:
+    if config.PASSWORD_HASH_STATS_LOG_SECONDS > 0:
+        start_periodic_job(
+            "password-hashing-stats",
+            config.PASSWORD_HASH_STATS_LOG_SECONDS,
+            password_hasher.log_stats,
+        )
+
+
+@app.on_event("startup")
+async def _recover_body_fat_jobs() -> None:
+    await bodyfat_jobs.recover()
+
+
+@app.on_event("shutdown")
+async def _stop_background_jobs() -> None:
+    await stop_periodic_jobs()
+    await bodyfat_jobs.stop()
+    await bodyfat_batcher.stop()
+    await dispose_async_engine()
+    password_hasher.shutdown()
+
 # Initialize USDA database on startup (lazy - only when needed)
 # Note: We don't initialize on startup to avoid reload loops with uvicorn --reload
 # The database will initialize automatically on first search request
@@ -153,77 +270,63 @@ def _get_allowed_origins() -> list[str]:
     return [origin.strip() for origin in raw_origins.split(",") if origin.strip()]
 
 
+# 업로드 엔드포인트: 본문을 파싱하는 동안 받은 바이트 수로 큰 요청을 거절
+UPLOAD_PATHS = {"/body-fat/analyze"}
+# multipart 경계와 헤더, 다른 폼 필드에 허용하는 여유분
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    paths=UPLOAD_PATHS,
+    max_bytes=config.UPLOAD_MAX_BYTES,
+    overhead_bytes=MULTIPART_OVERHEAD_BYTES,
+)
+
+# CORS가 가장 바깥에 있어야 413 응답에도 CORS 헤더가 붙는다
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_get_allowed_origins(),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # 정적 파일 서빙 (업로드된 이미지)
-uploads_dir = os.path.join(os.path.dirname(__file__), "..", "uploads")
-os.makedirs(uploads_dir, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
+os.makedirs(config.UPLOADS_DIR, exist_ok=True)
+app.mount("/uploads", StaticFiles(directory=config.UPLOADS_DIR), name="uploads")
 
 
-def _ensure_daily_summary(db: Session, user: models.User, date: dt.date) -> models.DailySummary:
-    summary = (
-        db.query(models.DailySummary)
-        .filter(models.DailySummary.user_id == user.id, models.DailySummary.date == date)
-        .first()
-    )
-    if summary is None:
-        summary = models.DailySummary(user=user, date=date)
-        db.add(summary)
-        db.flush()
-    return summary
+def _with_meal_tree(query):
+    """Eager-load items and food entries so MealOut serialization issues no lazy loads."""
+    return query.options(selectinload(models.Meal.items).selectinload(models.MealItem.food_entries))
 
 
-def _recalculate_summary(db: Session, user: models.User, date: dt.date) -> models.DailySummary:
-    totals = (
-        db.query(
-            models.FoodEntry.calories,
-            models.FoodEntry.protein,
-            models.FoodEntry.carbs,
-            models.FoodEntry.fat,
-        )
-        .join(models.MealItem, models.MealItem.id == models.FoodEntry.meal_item_id)
-        .join(models.Meal, models.Meal.id == models.MealItem.meal_id)
-        .filter(models.Meal.user_id == user.id, models.Meal.date == date)
-        .all()
+def _set_session_cookie(response: Response, token: str) -> None:
+    response.set_cookie(
+        key="session_token",
+        value=token,
+        httponly=True,
+        samesite="lax",
+        secure=False,  # 로컬 개발 환경에서는 False
+        path="/",
     )
 
-    total_calories = sum(entry.calories for entry in totals) if totals else 0.0
-    total_protein = sum((entry.protein or 0.0) for entry in totals) if totals else 0.0
-    total_carbs = sum((entry.carbs or 0.0) for entry in totals) if totals else 0.0
-    consumed_fat = sum((entry.fat or 0.0) for entry in totals) if totals else 0.0
-
-    # 지방 감량 계산: (TDEE - 오늘 총 칼로리) * 0.7 / 9
-    # Note: fat_loss는 계산되지만 별도 필드가 없으므로 현재는 저장하지 않음
-    # total_fat는 실제 섭취한 지방을 저장해야 함 (프론트엔드에서 매크로 비율 계산에 사용)
-    tdee = calculate_tdee(user.height_cm, user.weight_kg, user.age, user.gender, user.activity_level)
-    fat_loss = calculate_fat_loss(tdee, total_calories)
-
-    summary = _ensure_daily_summary(db, user, date)
-    summary.total_calories = total_calories
-    summary.total_protein = total_protein
-    summary.total_carbs = total_carbs
-    summary.total_fat = consumed_fat  # 실제 섭취한 지방 저장
-    db.flush()
-    MotivationMessageService(db).apply(user, summary)
-    return summary
 
+# 회원가입/로그인: bcrypt는 전용 프로세스 풀에서 실행되고, DB 작업은 그 전후에만
+# 스레드풀에서 수행한다. 해싱을 기다리는 동안에는 트랜잭션을 끝내 커넥션을 풀에 돌려준다.
 
-@app.post("/auth/register", response_model=schemas.SessionOut, status_code=status.HTTP_201_CREATED)
-def register_user(user_in: schemas.UserCreate, response: Response, db: Session = Depends(get_db)):
-    existing = db.execute(select(models.User).where(models.User.email == user_in.email)).scalar_one_or_none()
-    if existing:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
+def _email_registered(db: Session, email: str) -> bool:
+    exists = db.execute(select(models.User.id).where(models.User.email == email)).first() is not None
+    db.rollback()
+    return exists
+
+
+def _create_user(db: Session, user_in: schemas.UserCreate, password_hash: str) -> Tuple[str, schemas.UserOut]:
     user = models.User(
         email=user_in.email,
-        password_hash=auth.hash_password(user_in.password),
+        password_hash=password_hash,
         daily_calorie_target=user_in.daily_calorie_target,
         height_cm=user_in.height_cm,
         weight_kg=user_in.weight_kg,
@@ -233,44 +336,54 @@ def register_user(user_in: schemas.UserCreate, response: Response, db: Session =
     )
     db.add(user)
     db.flush()
+    return auth.issue_session_token(db, user), schemas.UserOut.from_orm(user)
 
-    session = auth.create_session_for_user(db, user)
-    response.set_cookie(
-        key="session_token",
-        value=session.token,
-        httponly=True,
-        samesite="lax",
-        secure=False,  # 로컬 개발 환경에서는 False
-        path="/",
-    )
-    return schemas.SessionOut(token=session.token, user=schemas.UserOut.from_orm(user))
+
+def _password_hash_for(db: Session, email: str) -> Optional[Tuple[int, str]]:
+    row = db.execute(
+        select(models.User.id, models.User.password_hash).where(models.User.email == email)
+    ).first()
+    db.rollback()
+    return tuple(row) if row is not None else None
+
+
+def _start_session(
+    db: Session, user_id: int, credentials: schemas.UserLogin
+) -> Tuple[str, schemas.UserOut]:
+    user = db.get(models.User, user_id)
+    if credentials.daily_calorie_target and credentials.daily_calorie_target != user.daily_calorie_target:
+        user.daily_calorie_target = credentials.daily_calorie_target
+        db.flush()
+        DailySummaryService(db).refresh_message(user, dt.date.today())
+    return auth.issue_session_token(db, user), schemas.UserOut.from_orm(user)
+
+
+@app.post("/auth/register", response_model=schemas.SessionOut, status_code=status.HTTP_201_CREATED)
+async def register_user(user_in: schemas.UserCreate, response: Response, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_email_registered, db, user_in.email):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+
+    password_hash = await hash_password_async(user_in.password)
+    token, user_out = await run_in_threadpool(_create_user, db, user_in, password_hash)
+    _set_session_cookie(response, token)
+    return schemas.SessionOut(token=token, user=user_out)
 
 
 @app.post("/auth/login", response_model=schemas.SessionOut)
-def login_user(
+async def login_user(
     credentials: schemas.UserLogin, response: Response, db: Session = Depends(get_db)
 ):
-    user = db.execute(select(models.User).where(models.User.email == credentials.email)).scalar_one_or_none()
-    if user is None or not auth.verify_password(credentials.password, user.password_hash):
+    found = await run_in_threadpool(_password_hash_for, db, credentials.email)
+    if found is None or not await verify_password_async(credentials.password, found[1]):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    if credentials.daily_calorie_target and credentials.daily_calorie_target != user.daily_calorie_target:
-        user.daily_calorie_target = credentials.daily_calorie_target
-
-    session = auth.create_session_for_user(db, user)
-    response.set_cookie(
-        key="session_token",
-        value=session.token,
-        httponly=True,
-        samesite="lax",
-        secure=False,  # 로컬 개발 환경에서는 False
-        path="/",
-    )
-    return schemas.SessionOut(token=session.token, user=schemas.UserOut.from_orm(user))
+    token, user_out = await run_in_threadpool(_start_session, db, found[0], credentials)
+    _set_session_cookie(response, token)
+    return schemas.SessionOut(token=token, user=user_out)
 
 
 @app.get("/auth/me", response_model=schemas.UserOut)
-def read_current_user(current_user: models.User = Depends(get_current_user)):
+def read_current_user(current_user: models.User = Depends(get_current_user_readonly)):
     return current_user
 
 
@@ -281,7 +394,10 @@ def update_calorie_target(
     db: Session = Depends(get_db),
 ):
     current_user.daily_calorie_target = target_update.daily_calorie_target
+    db.flush()
+    DailySummaryService(db).refresh_message(current_user, dt.date.today())
     db.commit()
+    auth.invalidate_user_tokens(current_user.id)
     db.refresh(current_user)
     return schemas.UserOut.from_orm(current_user)
 
@@ -306,10 +422,11 @@ def update_user_profile(
     db.commit()
     db.refresh(current_user)
     
-    # 사용자 정보가 업데이트되면 오늘 날짜의 summary를 재계산
+    # 사용자 정보가 업데이트되면 오늘 날짜의 메시지를 다시 선택
     today = dt.date.today()
-    _recalculate_summary(db, current_user, today)
+    DailySummaryService(db).refresh_message(current_user, today)
     db.commit()
+    auth.invalidate_user_tokens(current_user.id)
     
     return schemas.UserOut.from_orm(current_user)
 
@@ -321,32 +438,10 @@ def create_meal(
     db: Session = Depends(get_db),
 ):
     meal_date = meal_in.date or dt.date.today()
-
-    meal = models.Meal(user=current_user, name=meal_in.name, date=meal_date)
+    meal = build_meal(meal_in, current_user.id, meal_date)
     db.add(meal)
     db.flush()
-
-    for item in meal_in.items:
-        meal_item = models.MealItem(
-            meal=meal,
-            name=item.name,
-            quantity=item.quantity,
-            notes=item.notes,
-        )
-        db.add(meal_item)
-        db.flush()
-        db.add(
-            models.FoodEntry(
-                meal_item=meal_item,
-                calories=item.nutrition.calories,
-                protein=item.nutrition.protein,
-                carbs=item.nutrition.carbs,
-                fat=item.nutrition.fat,
-            )
-        )
-
-    _recalculate_summary(db, current_user, meal_date)
-    db.refresh(meal)
+    DailySummaryService(db).apply_delta(current_user, meal_date, NutritionTotals.from_meal(meal))
     return meal
 
 
@@ -375,12 +470,12 @@ def update_meal(
 
     db.flush()
     
-    # 날짜가 변경된 경우 두 날짜 모두 재계산
+    # 날짜가 변경된 경우 영양 합계를 이전 날짜에서 새 날짜로 이동
     if meal_update.date is not None and meal_update.date != old_date:
-        _recalculate_summary(db, current_user, old_date)
-        _recalculate_summary(db, current_user, meal.date)
-    else:
-        _recalculate_summary(db, current_user, meal.date)
+        moved = NutritionTotals.from_meal(meal)
+        summaries = DailySummaryService(db)
+        summaries.apply_delta(current_user, old_date, -moved)
+        summaries.apply_delta(current_user, meal.date, moved)
     
     db.refresh(meal)
     return meal
@@ -401,9 +496,10 @@ def delete_meal(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meal not found")
 
     meal_date = meal.date
+    removed = NutritionTotals.from_meal(meal)
     db.delete(meal)
     db.flush()
-    _recalculate_summary(db, current_user, meal_date)
+    DailySummaryService(db).apply_delta(current_user, meal_date, -removed)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -438,7 +534,6 @@ def update_meal_item(
         meal_item.quantity = item_update.quantity
 
     db.flush()
-    _recalculate_summary(db, current_user, meal.date)
     db.refresh(meal_item)
     return meal_item
 
@@ -468,76 +563,135 @@ def delete_meal_item(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meal item not found")
 
     meal_date = meal.date
+    removed = NutritionTotals.from_item(meal_item)
     db.delete(meal_item)
     db.flush()
-    _recalculate_summary(db, current_user, meal_date)
+    DailySummaryService(db).apply_delta(current_user, meal_date, -removed)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
-@app.get("/meals/recent", response_model=List[schemas.MealOut])
-def get_recent_meals(
-    days: int = 30,
+@app.post("/sync", response_model=schemas.SyncResponse)
+def sync_operations(
+    batch: schemas.SyncRequest,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """최근 N일간의 모든 meals를 반환합니다."""
-    start_date = dt.date.today() - dt.timedelta(days=days - 1)
-    meals: List[models.Meal] = (
-        db.query(models.Meal)
-        .filter(
-            models.Meal.user_id == current_user.id,
-            models.Meal.date >= start_date
+    """오프라인 동안 쌓인 변경(meal/item/workout/weight)을 순서대로 한 트랜잭션에 적용합니다.
+
+    op_id로 재전송을 걸러내고, 작업별 결과와 변경된 날짜의 summary를 반환합니다.
+    """
+    if len(batch.operations) > MAX_SYNC_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_SYNC_OPERATIONS} operations per request",
         )
-        .order_by(models.Meal.date.desc(), models.Meal.id.desc())
-        .all()
+    return SyncService(db, current_user).apply(batch.operations)
+
+
+@app.get("/meals/recent", response_model=List[schemas.MealOut])
+def get_recent_meals(
+    response: Response,
+    days: int = 30,
+    start: Optional[dt.date] = None,
+    end: Optional[dt.date] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
+):
+    """최근 N일(또는 start~end 기간)의 meals를 최신순으로 페이지 단위로 반환합니다.
+
+    다음 페이지가 있으면 X-Next-Cursor 헤더로 cursor를 전달합니다.
+    """
+    start_date = start or dt.date.today() - dt.timedelta(days=days - 1)
+    query = _with_meal_tree(db.query(models.Meal)).filter(
+        models.Meal.user_id == current_user.id,
+        models.Meal.date >= start_date,
     )
-    return meals
+    if end is not None:
+        query = query.filter(models.Meal.date <= end)
+    return paginate_by_date(query, models.Meal.date, models.Meal.id, cursor, limit, response)
 
 
 @app.get("/dashboard", response_model=schemas.DashboardResponse)
 def get_dashboard(
     date: Optional[dt.date] = None,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
 ):
     target_date = date or dt.date.today()
     meals: List[models.Meal] = (
-        db.query(models.Meal)
+        _with_meal_tree(db.query(models.Meal))
         .filter(models.Meal.user_id == current_user.id, models.Meal.date == target_date)
         .order_by(models.Meal.id.desc())
         .all()
     )
-    summary = _recalculate_summary(db, current_user, target_date)
+    summary = DailySummaryService(db).get(current_user, target_date)
     return schemas.DashboardResponse(user=current_user, meals=meals, summary=summary)
 
 
+@app.get("/changes", response_model=schemas.ChangeFeedOut)
+def get_changes(
+    since: int = 0,
+    limit: Optional[int] = None,
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
+):
+    """since(이전 응답의 cursor) 이후 변경된 meal/workout/weight/체지방 분석과 삭제 목록을 반환합니다.
+
+    has_more가 true이면 반환된 cursor로 다시 요청합니다. since=0은 전체 동기화입니다.
+    """
+    return ChangeFeedService(db).changes_since(current_user, since, limit)
+
+
+MAX_SUMMARY_RANGE_DAYS = 366
+
+
+@app.get("/summaries", response_model=List[schemas.DailySummaryOut])
+def get_summaries_in_range(
+    start: dt.date,
+    end: dt.date,
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
+):
+    """기간 내 일별 summary를 한 번에 반환합니다 (기록 없는 날은 0으로 채움)."""
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end must not be before start")
+    if (end - start).days + 1 > MAX_SUMMARY_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range may span at most {MAX_SUMMARY_RANGE_DAYS} days",
+        )
+    return DailySummaryService(db).get_range(current_user, start, end)
+
+
 @app.get("/summaries/{date}", response_model=schemas.DailySummaryOut)
 def get_summary_by_date(
     date: dt.date,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
 ):
-    summary = _recalculate_summary(db, current_user, date)
+    summary = DailySummaryService(db).get(current_user, date)
     return summary
 
 
 @app.get("/messages/today", response_model=schemas.MotivationMessageOut)
 def get_today_message(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
 ):
     today = dt.date.today()
-    summary = _recalculate_summary(db, current_user, today)
+    summary = DailySummaryService(db).get(current_user, today)
     return schemas.build_message_response(summary)
 
 
 @app.get("/messages/{date}", response_model=schemas.MotivationMessageOut)
 def get_message_by_date(
     date: dt.date,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
 ):
-    summary = _recalculate_summary(db, current_user, date)
+    summary = DailySummaryService(db).get(current_user, date)
     return schemas.build_message_response(summary)
 
 
@@ -547,16 +701,8 @@ def logout(
     token: str = Depends(get_token),
     db: Session = Depends(get_db),
 ):
-    user = auth.get_user_by_token(db, token)
-    if user is not None:
-        session = (
-            db.query(models.SessionToken)
-            .filter(models.SessionToken.user_id == user.id, models.SessionToken.token == token)
-            .first()
-        )
-        if session:
-            db.delete(session)
-            db.commit()
+    auth.revoke_session_token(db, token)
+    db.commit()
     response.delete_cookie("session_token")
     return response
 
@@ -564,116 +710,41 @@ def logout(
 @app.get("/foods/search", response_model=schemas.FoodSearchResponse)
 def search_foods(
     query: str,
+    background_tasks: BackgroundTasks,
     limit: int = 10,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
 ):
     normalized_query = query.strip()
     if len(normalized_query) < 2:
         return schemas.FoodSearchResponse(query=normalized_query, results=[])
 
     limit = max(1, min(limit, 25))
-    response_entries: List[Dict[str, Any]] = []
-    per_g_keys = ("kcal_per_g", "protein_per_g", "fat_per_g", "carb_per_g")
 
     # Search only from food_data.parquet (no database storage)
-    usda_results = search_usda_foods(normalized_query, limit=limit, include_micronutrients=False)
-    
-    # Convert USDA results to response format
-    for usda_food in usda_results:
-        per_g_payload = {key: usda_food.get(key) for key in per_g_keys}
-        response_entries.append({
-            "id": usda_food.get("fdc_id"),
-            "provider": "usda",
-            "provider_food_id": str(usda_food.get("fdc_id", "")),
-            "name": usda_food.get("description", ""),
-            "brand_name": usda_food.get("brand_owner"),
-            "serving_description": (
-                f"{usda_food.get('serving_size', '')} {usda_food.get('serving_size_unit', '')}".strip()
-                if usda_food.get("serving_size")
-                else None
-            ),
-            "calories": usda_food.get("kcal"),
-            "protein": usda_food.get("protein_g"),
-            "carbs": usda_food.get("carb_g"),
-            "fat": usda_food.get("fat_g"),
-            "created_by_user_id": None,
-            "last_refreshed": None,
-            **per_g_payload,
-        })
+    response_entries = usda_search_entries(normalized_query, limit)
     
     # Also search user-created custom foods from database
     custom_items: List[models.FoodItem] = []
     if len(response_entries) < limit:
         remaining = limit - len(response_entries)
-        custom_items = (
-            db.query(models.FoodItem)
-            .filter(
-                or_(
-                    models.FoodItem.name.ilike(f"%{normalized_query}%"),
-                    models.FoodItem.brand_name.ilike(f"%{normalized_query}%"),
-                )
-            )
-            .filter(
-                or_(
-                    models.FoodItem.created_by_user_id.is_(None),
-                    models.FoodItem.created_by_user_id == current_user.id,
-                )
-            )
-            .filter(models.FoodItem.provider != "usda")  # Exclude old USDA data
-            .order_by(models.FoodItem.search_count.desc(), models.FoodItem.updated_at.desc())
-            .limit(remaining)
-            .all()
+        custom_items = list(
+            db.execute(custom_foods_statement(normalized_query, current_user.id, remaining)).scalars()
         )
-        for item in custom_items:
-            response_entries.append({
-                "id": item.id,
-                "provider": item.provider,
-                "provider_food_id": item.provider_food_id,
-                "name": item.name,
-                "brand_name": item.brand_name,
-                "serving_description": item.serving_description,
-                "calories": item.calories,
-                "protein": item.protein,
-                "carbs": item.carbs,
-                "fat": item.fat,
-                "created_by_user_id": item.created_by_user_id,
-                "last_refreshed": item.last_refreshed,
-                "kcal_per_g": None,
-                "protein_per_g": None,
-                "fat_per_g": None,
-                "carb_per_g": None,
-            })
+        response_entries.extend(custom_food_entry(item) for item in custom_items)
     
-    # Update search counts for custom items only
-    for item in custom_items:
-        if hasattr(item, 'search_count'):
-            item.search_count += 1
-    
-    if custom_items:
-        db.commit()
-
-    def _clean_float(value: Any) -> Any:
-        if isinstance(value, float) and not math.isfinite(value):
-            return None
-        return value
+    # Update search counts for custom items only (after the response, on a writer session)
+    background_tasks.add_task(record_food_searches, [item.id for item in custom_items])
 
-    # Convert response entries to FoodItemOut models
-    response_models: List[schemas.FoodItemOut] = []
-    for entry in response_entries[:limit]:
-        # Clean float values
-        cleaned_entry = {k: _clean_float(v) for k, v in entry.items()}
-        response_models.append(schemas.FoodItemOut.parse_obj(cleaned_entry))
-
-    return schemas.FoodSearchResponse(query=normalized_query, results=response_models)
+    return build_search_response(normalized_query, response_entries, limit)
 
 
 @app.get("/foods/{food_id}/nutrition", response_model=schemas.FoodNutritionDetail)
 def get_food_nutrition(
     food_id: int,
     provider: Optional[str] = None,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
 ):
     # If provider is "usda", treat food_id as fdc_id and get directly from USDA data
     if provider == "usda":
@@ -867,7 +938,7 @@ def calculate_exercise_calories(
     duration_minutes: float,
     weight_kg: Optional[float] = None,
     category: Optional[str] = None,
-    current_user: models.User = Depends(get_current_user),
+    current_user: models.User = Depends(get_current_user_readonly),
 ):
     """운동 칼로리 계산"""
     # 사용자 체중이 없으면 기본값 사용
@@ -907,26 +978,10 @@ def create_workout(
     
     # 칼로리가 제공되지 않았고, 운동 이름과 시간이 있으면 자동 계산
     calories_burned = workout_in.calories_burned
-    if calories_burned is None and workout_in.activity_type and workout_in.duration_minutes:
-        try:
-            # 운동 이름에서 카테고리와 운동명 추출 시도
-            # 형식: "Category - Exercise Name" 또는 "Exercise Name"
-            activity_parts = workout_in.activity_type.split(" - ", 1)
-            if len(activity_parts) == 2:
-                category, exercise_name = activity_parts
-            else:
-                category = None
-                exercise_name = workout_in.activity_type
-            
-            calories_burned = calculate_calories_burned(
-                exercise_name=exercise_name,
-                duration_minutes=workout_in.duration_minutes,
-                weight_kg=current_user.weight_kg or 70.0,
-                category=category,
-            )
-        except Exception as e:
-            logger.warning(f"Could not auto-calculate calories: {e}")
-            calories_burned = None
+    if calories_burned is None:
+        calories_burned = estimate_workout_calories(
+            workout_in.activity_type, workout_in.duration_minutes, current_user.weight_kg
+        )
     
     workout = models.WorkoutLog(
         user=current_user,
@@ -945,18 +1000,26 @@ def create_workout(
 
 @app.get("/workouts", response_model=List[schemas.WorkoutLogOut])
 def get_workouts(
+    response: Response,
     date: Optional[dt.date] = None,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    start: Optional[dt.date] = None,
+    end: Optional[dt.date] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
 ):
-    """운동 로그 조회"""
+    """운동 로그 조회 (최신순, 페이지 단위; 다음 페이지 cursor는 X-Next-Cursor 헤더)"""
     query = db.query(models.WorkoutLog).filter(models.WorkoutLog.user_id == current_user.id)
     
     if date:
         query = query.filter(models.WorkoutLog.date == date)
+    if start:
+        query = query.filter(models.WorkoutLog.date >= start)
+    if end:
+        query = query.filter(models.WorkoutLog.date <= end)
     
-    workouts = query.order_by(models.WorkoutLog.date.desc(), models.WorkoutLog.id.desc()).all()
-    return workouts
+    return paginate_by_date(query, models.WorkoutLog.date, models.WorkoutLog.id, cursor, limit, response)
 
 
 @app.delete("/workouts/{workout_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -983,63 +1046,66 @@ def delete_workout(
 # Body Fat Analysis API (Template 3)
 # ============================================================================
 
-@app.post("/body-fat/analyze", response_model=schemas.BodyFatAnalysisOut, status_code=status.HTTP_201_CREATED)
+def _create_pending_analysis(
+    db: Session, user: models.User, analysis_date: dt.date, relative_image_path: str
+) -> models.BodyFatAnalysis:
+    analysis = models.BodyFatAnalysis(
+        user=user,
+        date=analysis_date,
+        image_path=relative_image_path,
+        status=BODY_FAT_PENDING,
+    )
+    db.add(analysis)
+    db.commit()
+    db.refresh(analysis)
+    return analysis
+
+
+@app.post("/body-fat/analyze", response_model=schemas.BodyFatAnalysisOut, status_code=status.HTTP_202_ACCEPTED)
 async def analyze_body_fat(
     file: UploadFile = File(...),
     date: Optional[dt.date] = None,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """체지방률 분석 (이미지 업로드 및 AI 분석)"""
-    # TODO: 실제 AI 모델 통합
-    # 현재는 더미 데이터 반환
+    """체지방률 분석 요청: 이미지를 저장하고 pending 상태의 분석을 바로 반환 (결과는 폴링)"""
     analysis_date = date or dt.date.today()
     
-    # 이미지 저장
-    upload_dir = os.path.join(os.path.dirname(__file__), "..", "uploads", "body_fat")
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # 파일 확장자 확인
-    file_ext = os.path.splitext(file.filename)[1] if file.filename else ".jpg"
-    if file_ext.lower() not in [".jpg", ".jpeg", ".png"]:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only JPG, JPEG, PNG files are allowed")
-    
-    image_filename = f"{current_user.id}_{analysis_date.isoformat()}_{uuid.uuid4().hex[:8]}{file_ext}"
+    # 이미지 저장: 청크 단위로 디스크에 스트리밍 (크기 제한, 확장자는 파일 시그니처로 결정)
+    upload_dir = os.path.join(config.UPLOADS_DIR, "body_fat")
+    await run_in_threadpool(os.makedirs, upload_dir, exist_ok=True)
+    try:
+        image_filename = await save_image_upload(
+            file,
+            upload_dir,
+            f"{current_user.id}_{analysis_date.isoformat()}_{uuid.uuid4().hex[:8]}",
+            config.UPLOAD_MAX_BYTES,
+            config.UPLOAD_CHUNK_BYTES,
+        )
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+    except UnsupportedImageType as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
     image_path = os.path.join(upload_dir, image_filename)
     
-    # 파일 저장
-    with open(image_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
-    
     # 상대 경로로 저장 (정적 파일이 /uploads에 마운트되어 있으므로, 
     # 마운트 지점 기준 상대 경로만 저장: "body_fat/{image_filename}")
     # 프론트엔드에서 /uploads + relative_image_path로 접근하면 /uploads/body_fat/...가 됨
     relative_image_path = f"body_fat/{image_filename}"
     
-    # 더미 체지방률 계산 (실제로는 AI 모델 사용)
-    body_fat_percentage = 15.0  # TODO: AI 모델로 계산
-    
-    # 더미 percentile 계산 (실제로는 통계 데이터 기반)
-    percentile_rank = 50.0  # TODO: 실제 통계 데이터 기반 계산
-    
-    analysis = models.BodyFatAnalysis(
-        user=current_user,
-        date=analysis_date,
-        image_path=relative_image_path,
-        body_fat_percentage=body_fat_percentage,
-        percentile_rank=percentile_rank,
-    )
-    db.add(analysis)
-    db.commit()
-    db.refresh(analysis)
+    # 커밋하면 current_user가 만료되므로 메타데이터를 먼저 읽어 둔다
+    metadata = BodyFatMetadata.from_user(current_user)
+    analysis = await run_in_threadpool(_create_pending_analysis, db, current_user, analysis_date, relative_image_path)
+
+    # 커밋 후에 작업을 넣어야 워커가 결과를 기록할 행이 보인다
+    bodyfat_jobs.submit(analysis.id, image_path, metadata)
     return analysis
 
 
 @app.get("/body-fat/analyses", response_model=List[schemas.BodyFatAnalysisOut])
 def get_body_fat_analyses(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
 ):
     """체지방률 분석 기록 조회"""
     analyses = (
@@ -1051,11 +1117,31 @@ def get_body_fat_analyses(
     return analyses
 
 
+@app.get("/body-fat/analyses/{analysis_id}", response_model=schemas.BodyFatAnalysisOut)
+def get_body_fat_analysis(
+    analysis_id: int,
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
+):
+    """체지방률 분석 단건 조회 (status가 pending이 아닐 때까지 폴링)"""
+    analysis = (
+        db.query(models.BodyFatAnalysis)
+        .filter(
+            models.BodyFatAnalysis.id == analysis_id,
+            models.BodyFatAnalysis.user_id == current_user.id,
+        )
+        .first()
+    )
+    if analysis is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Analysis not found")
+    return analysis
+
+
 @app.get("/body-fat/projections/{analysis_id}", response_model=List[schemas.BodyFatProjectionOut])
 def get_body_fat_projections(
     analysis_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_readonly),
+    db: Session = Depends(get_read_db),
 ):
     """체지방률 감소 시 예상 몸 이미지 생성"""
     analysis = (
@@ -0,0 +1,298 @@
+"""Versioned schema migrations.
+
+Each migration has an integer version and is recorded in the
+``schema_version`` table once it has been applied. ``run_migrations``
+applies every pending migration in order. Migrations must be idempotent
+because a run interrupted halfway is retried from the start of that
+migration.
+
+Long-running work is kept out of a single big transaction:
+``create_index_online`` builds each index in its own short transaction
+(``CREATE INDEX CONCURRENTLY`` on PostgreSQL), and ``backfill_in_batches``
+updates rows in small committed chunks so the SQLite write lock is
+released between batches.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateIndex
+
+from . import config
+from . import models  # noqa: F401 - registers tables on Base.metadata
+from .database import Base, engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+_version_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Engine], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str) -> Callable[[Callable[[Engine], None]], Callable[[Engine], None]]:
+    """Register *upgrade* as schema version *version*."""
+
+    def decorator(upgrade: Callable[[Engine], None]) -> Callable[[Engine], None]:
+        if any(existing.version == version for existing in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append(Migration(version, description, upgrade))
+        MIGRATIONS.sort(key=lambda item: item.version)
+        return upgrade
+
+    return decorator
+
+
+# ----------------------------------------------------------------------
+# Helpers for migration bodies
+
+
+def add_column_if_missing(
+    conn: Connection, table_name: str, column_name: str, default_sql: Optional[str] = None
+) -> bool:
+    """Add the model-declared *column_name* to *table_name* if it is absent."""
+
+    existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+    if column_name in existing:
+        return False
+    column = Base.metadata.tables[table_name].columns[column_name]
+    ddl = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column.type.compile(dialect=conn.dialect)}"
+    if default_sql is not None:
+        ddl += f" DEFAULT {default_sql}"
+    conn.execute(text(ddl))
+    logger.info("Added column %s.%s", table_name, column_name)
+    return True
+
+
+def create_index_online(bind: Engine, table_name: str, index_name: str) -> bool:
+    """Create a model-declared index without one long schema transaction.
+
+    PostgreSQL builds it with ``CREATE INDEX CONCURRENTLY`` so writers are
+    not blocked. SQLite has no concurrent build, so the index gets its own
+    short transaction and the busy timeout lets other writers wait it out.
+    """
+
+    with bind.connect() as conn:
+        if any(index["name"] == index_name for index in inspect(conn).get_indexes(table_name)):
+            return False
+
+    index = next(
+        index for index in Base.metadata.tables[table_name].indexes if index.name == index_name
+    )
+    if bind.dialect.name == "postgresql":
+        ddl = str(CreateIndex(index).compile(dialect=bind.dialect)).replace(
+            "CREATE INDEX", "CREATE INDEX CONCURRENTLY IF NOT EXISTS", 1
+        )
+        with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(ddl))
+    else:
+        with bind.begin() as conn:
+            index.create(bind=conn, checkfirst=True)
+    logger.info("Created index %s on %s", index_name, table_name)
+    return True
+
+
+def backfill_in_batches(
+    bind: Engine,
+    table_name: str,
+    set_clause: str,
+    where_clause: str,
+    batch_size: int = 500,
+    pause_seconds: float = 0.05,
+    params: Optional[Dict[str, object]] = None,
+) -> int:
+    """Run ``UPDATE table SET set_clause WHERE where_clause`` in committed chunks.
+
+    *where_clause* must stop matching rows once they are updated, otherwise
+    the loop never ends.
+    """
+
+    statement = text(
+        f"UPDATE {table_name} SET {set_clause} "
+        f"WHERE id IN (SELECT id FROM {table_name} WHERE {where_clause} LIMIT :batch_size)"
+    )
+    total = 0
+    while True:
+        with bind.begin() as conn:
+            updated = conn.execute(statement, {**(params or {}), "batch_size": batch_size}).rowcount
+        total += updated
+        if updated < batch_size:
+            break
+        time.sleep(pause_seconds)
+    if total:
+        logger.info("Backfilled %d rows in %s", total, table_name)
+    return total
+
+
+# ----------------------------------------------------------------------
+# Migrations
+
+
+@migration(1, "Create base tables")
+def _create_base_tables(bind: Engine) -> None:
+    # Creates any missing table with its current model definition. Later
+    # migrations bring tables that predate a column or index up to date.
+    Base.metadata.create_all(bind=bind, checkfirst=True)
+
+
+@migration(2, "Add user profile columns")
+def _add_user_profile(bind: Engine) -> None:
+    with bind.begin() as conn:
+        for column_name in ("height_cm", "weight_kg", "age", "gender"):
+            add_column_if_missing(conn, "users", column_name)
+
+
+@migration(3, "Add users.activity_level")
+def _add_activity_level(bind: Engine) -> None:
+    with bind.begin() as conn:
+        add_column_if_missing(conn, "users", "activity_level", default_sql="'sedentary'")
+
+
+@migration(4, "Add daily_summaries.message_fingerprint")
+def _add_message_fingerprint(bind: Engine) -> None:
+    with bind.begin() as conn:
+        add_column_if_missing(conn, "daily_summaries", "message_fingerprint")
+
+
+@migration(5, "Add (user_id, date) and foreign-key indexes")
+def _add_hot_path_indexes(bind: Engine) -> None:
+    for table_name, index_name in (
+        ("meals", "ix_meals_user_date"),
+        ("meal_items", "ix_meal_items_meal_id"),
+        ("food_entries", "ix_food_entries_meal_item_id"),
+        ("workout_logs", "ix_workout_logs_user_date"),
+        ("body_fat_analyses", "ix_body_fat_analyses_user_date"),
+        ("session_tokens", "ix_session_tokens_user_id"),
+    ):
+        create_index_online(bind, table_name, index_name)
+
+
+@migration(6, "Create sync_operations")
+def _create_sync_operations(bind: Engine) -> None:
+    Base.metadata.tables["sync_operations"].create(bind=bind, checkfirst=True)
+
+
+@migration(7, "Create change_log and seed it with existing records")
+def _create_change_log(bind: Engine) -> None:
+    Base.metadata.tables["change_log"].create(bind=bind, checkfirst=True)
+    # Clients start from since=0, so every existing record needs an entry.
+    for table_name, entity_type in (
+        ("meals", "meal"),
+        ("workout_logs", "workout"),
+        ("weight_logs", "weight"),
+        ("body_fat_analyses", "body_fat_analysis"),
+    ):
+        with bind.begin() as conn:
+            conn.execute(
+                text(
+                    f"INSERT INTO change_log (user_id, entity_type, entity_id, deleted, changed_at) "
+                    f"SELECT t.user_id, :entity_type, t.id, :deleted, :changed_at FROM {table_name} t "
+                    f"WHERE NOT EXISTS (SELECT 1 FROM change_log c "
+                    f"WHERE c.entity_type = :entity_type AND c.entity_id = t.id) "
+                    f"ORDER BY t.id"
+                ),
+                {"entity_type": entity_type, "deleted": False, "changed_at": dt.datetime.utcnow()},
+            )
+
+
+@migration(8, "Create revoked_tokens")
+def _create_revoked_tokens(bind: Engine) -> None:
+    Base.metadata.tables["revoked_tokens"].create(bind=bind, checkfirst=True)
+
+
+@migration(9, "Index token expiry and give legacy sessions an expiry")
+def _index_token_expiry(bind: Engine) -> None:
+    create_index_online(bind, "session_tokens", "ix_session_tokens_expires_at")
+    create_index_online(bind, "revoked_tokens", "ix_revoked_tokens_expires_at")
+    # Sessions created without an expiry never expired. They get the full
+    # lifetime from now on, so nobody is logged out by the upgrade.
+    backfill_in_batches(
+        bind,
+        "session_tokens",
+        "expires_at = :expires_at",
+        "expires_at IS NULL",
+        params={"expires_at": dt.datetime.utcnow() + dt.timedelta(days=config.SESSION_TTL_DAYS)},
+    )
+
+
+@migration(10, "Add body_fat_analyses.status")
+def _add_body_fat_status(bind: Engine) -> None:
+    with bind.begin() as conn:
+        add_column_if_missing(conn, "body_fat_analyses", "status", default_sql="'completed'")
+
+
+@migration(11, "Add body_fat_analyses.error_message")
+def _add_body_fat_error_message(bind: Engine) -> None:
+    with bind.begin() as conn:
+        add_column_if_missing(conn, "body_fat_analyses", "error_message")
+
+
+# ----------------------------------------------------------------------
+# Runner
+
+
+def applied_versions(bind: Engine = default_engine) -> Dict[int, dt.datetime]:
+    _version_metadata.create_all(bind=bind, checkfirst=True)
+    with bind.connect() as conn:
+        rows = conn.execute(select(schema_version.c.version, schema_version.c.applied_at))
+        return {row.version: row.applied_at for row in rows}
+
+
+def pending_migrations(bind: Engine = default_engine) -> List[Migration]:
+    applied = applied_versions(bind)
+    return [item for item in MIGRATIONS if item.version not in applied]
+
+
+def run_migrations(bind: Engine = default_engine) -> List[int]:
+    """Apply every pending migration in version order; returns applied versions."""
+
+    applied: List[int] = []
+    for item in pending_migrations(bind):
+        logger.info("Applying migration %d: %s", item.version, item.description)
+        item.upgrade(bind)
+        try:
+            with bind.begin() as conn:
+                conn.execute(
+                    schema_version.insert().values(
+                        version=item.version,
+                        description=item.description,
+                        applied_at=dt.datetime.utcnow(),
+                    )
+                )
+        except IntegrityError:
+            # Another worker recorded it first; the upgrade itself is idempotent.
+            logger.info("Migration %d was recorded concurrently", item.version)
+        applied.append(item.version)
+    return applied
@@ -4,11 +4,13 @@ import datetime as dt
 import uuid
 
 from sqlalchemy import (
+    Boolean,
     Column,
     Date,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -46,16 +48,34 @@ class SessionToken(Base):
 
     id = Column(Integer, primary_key=True)
     token = Column(String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at = Column(DateTime, default=dt.datetime.utcnow, nullable=False)
-    expires_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True, index=True)  # 만료된 세션은 주기 작업이 삭제
 
     user = relationship("User", back_populates="sessions")
 
 
+class RevokedToken(Base):
+    """Signed session tokens logged out before their expiry."""
+
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(32), unique=True, nullable=False)  # 서명 토큰의 고유 ID
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)  # 이 시각 이후에는 토큰 자체가 만료됨
+    revoked_at = Column(DateTime, default=dt.datetime.utcnow, nullable=False, index=True)
+
+
 class Meal(Base):
     __tablename__ = "meals"
-    __table_args__ = (UniqueConstraint("user_id", "date", "name", name="uq_meal_user_date_name"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", "name", name="uq_meal_user_date_name"),
+        # uq_meal_user_date_name도 (user_id, date)로 검색되지만 name 순서라 ORDER BY date, id에
+        # 정렬 단계가 추가된다. 이 인덱스는 rowid(id)가 바로 뒤에 와서 dashboard와 keyset 페이지가
+        # 정렬 없이 LIMIT에서 멈출 수 있다 (scripts/explain_hot_queries.py가 확인).
+        Index("ix_meals_user_date", "user_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -70,7 +90,7 @@ class MealItem(Base):
     __tablename__ = "meal_items"
 
     id = Column(Integer, primary_key=True)
-    meal_id = Column(Integer, ForeignKey("meals.id", ondelete="CASCADE"), nullable=False)
+    meal_id = Column(Integer, ForeignKey("meals.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String(255), nullable=False)
     quantity = Column(String(100), nullable=True)
     notes = Column(Text, nullable=True)
@@ -83,7 +103,7 @@ class FoodEntry(Base):
     __tablename__ = "food_entries"
 
     id = Column(Integer, primary_key=True)
-    meal_item_id = Column(Integer, ForeignKey("meal_items.id", ondelete="CASCADE"), nullable=False)
+    meal_item_id = Column(Integer, ForeignKey("meal_items.id", ondelete="CASCADE"), nullable=False, index=True)
     calories = Column(Float, nullable=False)
     protein = Column(Float, nullable=True)
     carbs = Column(Float, nullable=True)
@@ -137,6 +157,7 @@ class DailySummary(Base):
     message_push = Column(Text, nullable=True)
     message_email_subject = Column(String(255), nullable=True)
     message_email_body = Column(Text, nullable=True)
+    message_fingerprint = Column(String(40), nullable=True)  # 메시지 선택 입력값 해시 (SHA-1)
     updated_at = Column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow)
 
     user = relationship("User", back_populates="summaries")
@@ -157,6 +178,7 @@ class WeightLog(Base):
 
 class WorkoutLog(Base):
     __tablename__ = "workout_logs"
+    __table_args__ = (Index("ix_workout_logs_user_date", "user_id", "date"),)
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -173,6 +195,7 @@ class WorkoutLog(Base):
 
 class BodyFatAnalysis(Base):
     __tablename__ = "body_fat_analyses"
+    __table_args__ = (Index("ix_body_fat_analyses_user_date", "user_id", "date"),)
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -180,6 +203,41 @@ class BodyFatAnalysis(Base):
     image_path = Column(String(500), nullable=False)  # 업로드된 이미지 경로
     body_fat_percentage = Column(Float, nullable=True)  # AI로 계산된 체지방률
     percentile_rank = Column(Float, nullable=True)  # 상위 몇%인지
+    status = Column(String(16), nullable=False, default="completed")  # 분석 작업 상태: 'pending', 'completed', 'failed'
+    error_message = Column(String(255), nullable=True)  # failed일 때 사유
     created_at = Column(DateTime, default=dt.datetime.utcnow, nullable=False)
 
     user = relationship("User", back_populates="body_fat_analyses")
+
+
+class SyncOperation(Base):
+    """Client-generated operation ids already applied through ``POST /sync``."""
+
+    __tablename__ = "sync_operations"
+    __table_args__ = (UniqueConstraint("user_id", "op_id", name="uq_sync_user_op"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    op_id = Column(String(64), nullable=False)  # 클라이언트가 생성한 작업 ID
+    op_type = Column(String(32), nullable=False)
+    entity_id = Column(Integer, nullable=True)  # 생성/수정된 레코드의 서버 ID
+    created_at = Column(DateTime, default=dt.datetime.utcnow, nullable=False)
+
+
+class ChangeLogEntry(Base):
+    """Per-user change sequence behind ``GET /changes``.
+
+    One row per changed record (meals include their items and food
+    entries); ``id`` is the sequence clients page through. Rows are written
+    by the session hook in ``services/change_feed.py``.
+    """
+
+    __tablename__ = "change_log"
+    __table_args__ = (Index("ix_change_log_user_seq", "user_id", "id"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    entity_type = Column(String(32), nullable=False)  # 'meal', 'workout', 'weight', 'body_fat_analysis'
+    entity_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False)  # 삭제 tombstone
+    changed_at = Column(DateTime, default=dt.datetime.utcnow, nullable=False)
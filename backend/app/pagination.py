@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime as dt
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(date: dt.date, row_id: int) -> str:
+    raw = f"{date.isoformat()}:{row_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[dt.date, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+        date_part, id_part = raw.split(":", 1)
+        return dt.date.fromisoformat(date_part), int(id_part)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def paginate_by_date(
+    query: Query,
+    date_column,
+    id_column,
+    cursor: Optional[str],
+    limit: Optional[int],
+    response: Response,
+) -> List:
+    """Return one newest-first page of *query* keyed on ``(date, id)``.
+
+    When more rows remain, the cursor for the next page is sent in the
+    ``X-Next-Cursor`` response header.
+    """
+
+    page_size = clamp_page_size(limit)
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                date_column < cursor_date,
+                and_(date_column == cursor_date, id_column < cursor_id),
+            )
+        )
+    rows = query.order_by(date_column.desc(), id_column.desc()).limit(page_size + 1).all()
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.date, last.id)
+    return rows
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import datetime as dt
-from typing import Dict, List, Optional, TYPE_CHECKING, Literal
+from typing import Any, Dict, List, Optional, TYPE_CHECKING, Literal
 
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 
@@ -263,6 +263,63 @@ class WorkoutLogOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Weight Log Schemas
+class WeightLogUpsert(BaseModel):
+    date: Optional[dt.date] = None
+    weight_kg: float = Field(ge=20, le=500)
+
+
+class WeightLogOut(BaseModel):
+    id: int
+    date: dt.date
+    weight_kg: float
+    created_at: dt.datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Offline Sync Schemas
+SyncOperationType = Literal[
+    "meal.create",
+    "meal.update",
+    "meal.delete",
+    "meal_item.update",
+    "meal_item.delete",
+    "workout.create",
+    "workout.delete",
+    "weight.upsert",
+    "weight.delete",
+]
+
+
+class SyncOperationIn(BaseModel):
+    """오프라인에서 기록된 변경 하나 (op_id는 클라이언트가 생성, 재전송 시 동일)"""
+    op_id: str = Field(min_length=1, max_length=64)
+    type: SyncOperationType
+    # 대상 레코드: 서버 ID 또는 앞서 적용된 create 작업의 op_id
+    target_id: Optional[int] = None
+    target_op_id: Optional[str] = None
+    item_id: Optional[int] = None  # meal_item.* 작업의 MealItem ID
+    # type별 본문: MealCreate / MealUpdate / MealItemUpdate / WorkoutLogCreate / WeightLogUpsert
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+
+class SyncRequest(BaseModel):
+    operations: List[SyncOperationIn]
+
+
+class SyncOperationResult(BaseModel):
+    op_id: str
+    status: Literal["applied", "duplicate", "error"]
+    entity_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class SyncResponse(BaseModel):
+    results: List[SyncOperationResult]
+    summaries: List[DailySummaryOut]  # 변경된 날짜의 재계산된 summary
+
+
 # Body Fat Analysis Schemas
 class BodyFatAnalysisCreate(BaseModel):
     date: Optional[dt.date] = None
@@ -275,6 +332,8 @@ class BodyFatAnalysisOut(BaseModel):
     image_path: str
     body_fat_percentage: Optional[float]
     percentile_rank: Optional[float]
+    status: Literal["pending", "completed", "failed"] = "completed"  # pending이면 결과를 폴링
+    error_message: Optional[str] = None  # failed일 때 사유
     created_at: dt.datetime
 
     model_config = ConfigDict(from_attributes=True)
@@ -285,3 +344,20 @@ class BodyFatProjectionOut(BaseModel):
     reduction_percentage: float  # 5, 10, 15, 20
     projected_body_fat: float  # 예상 체지방률
     projected_image_path: Optional[str] = None  # AI 생성 이미지 경로
+
+
+# Change Feed Schemas
+class DeletedRecordOut(BaseModel):
+    type: Literal["meal", "workout", "weight", "body_fat_analysis"]
+    id: int
+
+
+class ChangeFeedOut(BaseModel):
+    """since 이후 변경된 레코드의 현재 상태와 삭제 tombstone"""
+    cursor: int  # 다음 요청의 since 값
+    has_more: bool
+    meals: List[MealOut]
+    workouts: List[WorkoutLogOut]
+    weight_logs: List[WeightLogOut]
+    body_fat_analyses: List[BodyFatAnalysisOut]
+    deleted: List[DeletedRecordOut]
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""체지방 모델 CPU 추론 벤치마크
+
+Loads the ONNX body-fat model the way the API does and times one
+prediction per image: decode, resize and the forward pass. Prints p50,
+p95 and max latency and exits with status 1 if p95 is over the budget
+(BODYFAT_LATENCY_BUDGET_MS by default).
+
+With ``--concurrency N`` it also sends N concurrent requests through the
+API's micro-batching queue and compares throughput with one-at-a-time
+inference (batch size 1).
+
+Usage:
+    python app/scripts/benchmark_bodyfat_inference.py --model data/body_fat/model.onnx --iterations 50
+    python app/scripts/benchmark_bodyfat_inference.py --concurrency 16 --iterations 160
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# backend/app/scripts/에서 실행되므로 backend 디렉토리를 경로에 추가
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app import config
+from app.services.bodyfat_batcher import InferenceBatcher
+from app.services.bodyfat_inference import BodyFatMetadata, BodyFatModel
+
+SAMPLE_METADATA = BodyFatMetadata(sex="male", age=30, height_cm=175.0, weight_kg=72.0)
+
+
+def _default_image() -> Path:
+    images = sorted((backend_dir / "app" / "data" / "body_fat").glob("*.png"))
+    if not images:
+        raise SystemExit("No sample image found; pass --image")
+    return images[0]
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def _run_concurrent(batcher: InferenceBatcher, image: Path, concurrency: int, requests: int) -> float:
+    remaining = iter(range(requests))
+
+    async def client():
+        for _ in remaining:
+            await batcher.predict(image, SAMPLE_METADATA)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await batcher.stop()
+    return elapsed
+
+
+def _compare_batching(model: BodyFatModel, image: Path, concurrency: int, requests: int) -> None:
+    print(f"\n{concurrency} concurrent clients, {requests} requests:")
+    profiles = (
+        ("one at a time", 1, 0.0),
+        (
+            f"batched (max {config.BODYFAT_BATCH_MAX_SIZE}, {config.BODYFAT_BATCH_MAX_WAIT_MS:g} ms)",
+            config.BODYFAT_BATCH_MAX_SIZE,
+            config.BODYFAT_BATCH_MAX_WAIT_MS,
+        ),
+    )
+    for name, max_batch_size, max_wait_ms in profiles:
+        batcher = InferenceBatcher(max_batch_size, max_wait_ms, model_loader=lambda: model)
+        elapsed = asyncio.run(_run_concurrent(batcher, image, concurrency, requests))
+        print(
+            f"  {name:<32} {requests / elapsed:7.1f} images/s"
+            f"  avg batch {batcher.requests / max(batcher.batches, 1):4.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=config.BODYFAT_MODEL_PATH)
+    parser.add_argument("--image", type=Path, default=None)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=config.BODYFAT_INTRA_OP_THREADS)
+    parser.add_argument("--budget-ms", type=float, default=config.BODYFAT_LATENCY_BUDGET_MS)
+    parser.add_argument("--concurrency", type=int, default=0, help="also compare batched throughput")
+    args = parser.parse_args()
+
+    image = args.image or _default_image()
+    meta_cols = [column.strip() for column in config.BODYFAT_MODEL_META_COLS.split(",") if column.strip()]
+    started = time.perf_counter()
+    model = BodyFatModel(args.model, meta_cols, args.threads)
+    print(f"Model: {args.model} (input {model.image_size[0]}x{model.image_size[1]}, meta {model.meta_cols or '-'})")
+    print(f"Load: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    for _ in range(args.warmup):
+        model.predict(image, SAMPLE_METADATA)
+
+    latencies = []
+    for _ in range(args.iterations):
+        started = time.perf_counter()
+        prediction = model.predict(image, SAMPLE_METADATA)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    p95 = _percentile(latencies, 0.95)
+    print(f"Prediction for {image.name}: {prediction:.1f}%")
+    print(
+        f"Latency over {args.iterations} runs: p50 {statistics.median(latencies):.1f} ms"
+        f"  p95 {p95:.1f} ms  max {max(latencies):.1f} ms  (budget {args.budget_ms:.0f} ms)"
+    )
+    if args.concurrency > 1:
+        _compare_batching(model, image, args.concurrency, args.iterations)
+    if p95 > args.budget_ms:
+        print("Over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""SQLite 동시성 벤치마크: 기본 설정(rollback journal) vs 튜닝 설정(WAL + PRAGMA)
+
+Runs the same mixed workload against two throwaway database files:
+writer threads log meals (meal + item + entry + summary update in one
+transaction, like ``POST /meals``) while reader threads load a day's
+summary and meals (like ``GET /dashboard``). Prints throughput, p95
+latency and lock errors for each profile.
+
+Usage:
+    python app/scripts/benchmark_sqlite_concurrency.py --writers 4 --readers 16 --seconds 10
+"""
+
+import argparse
+import datetime as dt
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# backend/app/scripts/에서 실행되므로 backend 디렉토리를 경로에 추가
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app import config, models
+from app.database import Base, configure_sqlite_engine, sqlite_pragmas
+
+USERS = 20
+
+
+def _build_engine(path: Path, tuned: bool):
+    if tuned:
+        engine = create_engine(
+            f"sqlite:///{path.as_posix()}",
+            connect_args={"check_same_thread": False, "timeout": config.SQLITE_BUSY_TIMEOUT_MS / 1000.0},
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT_SECONDS,
+        )
+        configure_sqlite_engine(engine)
+    else:
+        # Previous defaults: rollback journal, sqlite3's default timeout, default pool.
+        engine = create_engine(f"sqlite:///{path.as_posix()}", connect_args={"check_same_thread": False})
+        configure_sqlite_engine(engine, ["PRAGMA journal_mode = DELETE"])
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def _seed(Session) -> None:
+    with Session() as session:
+        for index in range(USERS):
+            user = models.User(email=f"bench{index}@example.com", password_hash="x")
+            session.add(user)
+            session.add(models.DailySummary(user=user, date=dt.date.today()))
+        session.commit()
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {"write": [], "read": []}
+        self.errors = {"write": 0, "read": 0}
+
+    def record(self, kind: str, seconds: float) -> None:
+        with self.lock:
+            self.latencies[kind].append(seconds)
+
+    def error(self, kind: str) -> None:
+        with self.lock:
+            self.errors[kind] += 1
+
+
+def _writer(Session, stats: Stats, stop: threading.Event, worker: int) -> None:
+    counter = 0
+    today = dt.date.today()
+    while not stop.is_set():
+        counter += 1
+        user_id = (worker + counter) % USERS + 1
+        started = time.perf_counter()
+        session = Session()
+        try:
+            meal = models.Meal(user_id=user_id, name=f"w{worker}-{counter}", date=today)
+            item = models.MealItem(meal=meal, name="bench item")
+            models.FoodEntry(meal_item=item, calories=250.0, protein=10.0, carbs=30.0, fat=8.0)
+            session.add(meal)
+            summary = (
+                session.query(models.DailySummary)
+                .filter(models.DailySummary.user_id == user_id, models.DailySummary.date == today)
+                .one()
+            )
+            summary.total_calories += 250.0
+            session.commit()
+            stats.record("write", time.perf_counter() - started)
+        except OperationalError:
+            session.rollback()
+            stats.error("write")
+        finally:
+            session.close()
+
+
+def _reader(Session, stats: Stats, stop: threading.Event, worker: int) -> None:
+    counter = 0
+    today = dt.date.today()
+    while not stop.is_set():
+        counter += 1
+        user_id = (worker + counter) % USERS + 1
+        started = time.perf_counter()
+        session = Session()
+        try:
+            session.query(models.DailySummary).filter(
+                models.DailySummary.user_id == user_id, models.DailySummary.date == today
+            ).first()
+            session.query(models.Meal).filter(models.Meal.user_id == user_id, models.Meal.date == today).all()
+            session.rollback()
+            stats.record("read", time.perf_counter() - started)
+        except OperationalError:
+            session.rollback()
+            stats.error("read")
+        finally:
+            session.close()
+
+
+def _p95(values) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=20)[-1]
+
+
+def run_profile(name: str, tuned: bool, writers: int, readers: int, seconds: float) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _build_engine(Path(tmp) / "bench.db", tuned)
+        Session = sessionmaker(bind=engine, autoflush=False, future=True)
+        _seed(Session)
+
+        stats = Stats()
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=_writer, args=(Session, stats, stop, index)) for index in range(writers)
+        ] + [threading.Thread(target=_reader, args=(Session, stats, stop, index)) for index in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    print(f"\n== {name}")
+    for kind in ("write", "read"):
+        latencies = stats.latencies[kind]
+        print(
+            f"  {kind:>5}: {len(latencies) / seconds:8.1f} ops/s"
+            f"  p95 {_p95(latencies) * 1000:7.1f} ms"
+            f"  errors {stats.errors[kind]}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"Tuned PRAGMAs: {'; '.join(sqlite_pragmas())}")
+    run_profile("baseline (rollback journal)", False, args.writers, args.readers, args.seconds)
+    run_profile("tuned (WAL + PRAGMAs + pool)", True, args.writers, args.readers, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
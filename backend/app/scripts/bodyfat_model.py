@@ -11,7 +11,7 @@ Features
 - Optional metadata (sex, age, height_cm, weight_kg) concatenated in head
 - Strong but safe augmentations for body images
 - TorchMetrics for MAE/RMSE/R2 + calibration bins
-- ONNX export (fp32) and dynamic axes
+- ONNX export (fp32) and dynamic axes, plus optional graph optimization and INT8 quantization
 
 Expected Data Layout
 --------------------
@@ -45,6 +45,10 @@ Quickstart
 4) Export ONNX:
    python vit_bfp.py --csv data/bfp_labels.csv --img-root data/images --out runs/vit_b16 --export-onnx model_best.pth onnx/model.onnx
 
+5) Export for CPU serving (graph-optimized + INT8, calibrated on val_split.csv) and compare
+   MAE/RMSE and per-image CPU latency against fp32 on the test split (written to onnx_eval.txt):
+   python vit_bfp.py ... --export-onnx model_best.pth onnx/model.onnx --optimize-onnx --quantize static
+
 Notes
 - Ensure consistent photo protocol (frontal view, ~2 m distance, arms/legs apart, camera at chest height).
 - If metadata is absent, omit --use-meta and --meta-cols.
@@ -56,6 +60,7 @@ import os
 import random
 from pathlib import Path
 import math
+import time
 
 import cv2
 import numpy as np
@@ -318,6 +323,102 @@ def evaluate(model, loader, device):
     }
 
 
+# -----------------------------
+# ONNX optimization / quantization (CPU serving)
+# -----------------------------
+def onnx_variant_path(onnx_path: str, tag: str) -> str:
+    p = Path(onnx_path)
+    return str(p.with_name(f"{p.stem}.{tag}{p.suffix}"))
+
+
+def optimize_onnx(onnx_path: str, out_path: str):
+    """Save onnxruntime's graph-optimized model (fusions, constant folding).
+
+    EXTENDED rather than ALL: layout optimizations are hardware specific and
+    are applied again when the serving session loads the model.
+    """
+    import onnxruntime as ort
+    so = ort.SessionOptions()
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    so.optimized_model_filepath = out_path
+    ort.InferenceSession(onnx_path, sess_options=so, providers=["CPUExecutionProvider"])
+    print(f"Saved optimized ONNX to {out_path}")
+
+
+def _onnx_feeds(sample):
+    feeds = {"image": sample["image"].unsqueeze(0).numpy()}
+    if "meta" in sample:
+        feeds["meta"] = sample["meta"].unsqueeze(0).numpy()
+    return feeds
+
+
+def quantize_onnx(onnx_path: str, out_path: str, mode: str, calib_ds=None, calib_samples: int = 200):
+    """INT8 weights; 'static' also calibrates activation ranges on calib_ds (validation split)."""
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_dynamic, quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    prepped = onnx_variant_path(onnx_path, "prep")
+    quant_pre_process(onnx_path, prepped)
+    if mode == "dynamic":
+        quantize_dynamic(prepped, out_path, weight_type=QuantType.QInt8)
+    else:
+        class ValCalibrationReader(CalibrationDataReader):
+            def __init__(self, ds, n):
+                idx = list(range(len(ds)))
+                random.Random(0).shuffle(idx)
+                self.it = (_onnx_feeds(ds[i]) for i in idx[:n])
+
+            def get_next(self):
+                return next(self.it, None)
+
+        quantize_static(prepped, out_path, ValCalibrationReader(calib_ds, calib_samples),
+                        quant_format=QuantFormat.QDQ, per_channel=True,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    os.remove(prepped)
+    print(f"Saved {mode} INT8 ONNX to {out_path}")
+
+
+def evaluate_onnx(onnx_path: str, ds, threads: int = 0):
+    """MAE/RMSE on ds with batch-1 CPU inference, plus median latency per image."""
+    import onnxruntime as ort
+    so = ort.SessionOptions()
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads > 0:
+        so.intra_op_num_threads = threads
+    sess = ort.InferenceSession(onnx_path, sess_options=so, providers=["CPUExecutionProvider"])
+    errs, times = [], []
+    for i in tqdm(range(len(ds)), desc=Path(onnx_path).name, leave=False):
+        sample = ds[i]
+        feeds = _onnx_feeds(sample)
+        t0 = time.perf_counter()
+        pred = sess.run(None, feeds)[0].reshape(-1)[0]
+        times.append(time.perf_counter() - t0)
+        errs.append(float(pred) - float(sample["target"]))
+    errs = np.array(errs)
+    return {
+        "mae": float(np.abs(errs).mean()),
+        "rmse": float(np.sqrt((errs ** 2).mean())),
+        "latency_ms": float(np.median(times) * 1000),
+        "size_mb": os.path.getsize(onnx_path) / 1e6,
+    }
+
+
+def compare_onnx_variants(variants, ds, out_dir: str, threads: int = 0):
+    """Evaluate each (name, path) on ds; report deltas against the first (fp32)."""
+    results = [(name, path, evaluate_onnx(path, ds, threads)) for name, path in variants]
+    base = results[0][2]
+    lines = [f"{'variant':<12} {'MAE':>7} {'dMAE':>7} {'RMSE':>7} {'dRMSE':>7} {'ms/img':>8} {'MB':>7}"]
+    for name, _, r in results:
+        lines.append(f"{name:<12} {r['mae']:7.3f} {r['mae'] - base['mae']:+7.3f} {r['rmse']:7.3f} "
+                     f"{r['rmse'] - base['rmse']:+7.3f} {r['latency_ms']:8.1f} {r['size_mb']:7.1f}")
+    report = "\n".join(lines)
+    print(report)
+    with open(Path(out_dir)/'onnx_eval.txt', 'w') as f:
+        f.write(report + "\n")
+    return results
+
+
 # -----------------------------
 # Main
 # -----------------------------
@@ -339,6 +440,12 @@ def main():
     ap.add_argument('--meta-cols', type=str, default='')
     ap.add_argument('--eval', action='store_true')
     ap.add_argument('--export-onnx', nargs=2, metavar=('CKPT','ONNX'))
+    ap.add_argument('--optimize-onnx', action='store_true',
+                    help='with --export-onnx: also save an onnxruntime graph-optimized model (<name>.opt.onnx)')
+    ap.add_argument('--quantize', choices=['dynamic', 'static'],
+                    help='with --export-onnx: also save an INT8 model (<name>.int8.onnx); static calibrates on val_split')
+    ap.add_argument('--calib-samples', type=int, default=200)
+    ap.add_argument('--onnx-threads', type=int, default=0, help='intra-op threads for the CPU latency check (0 = all)')
     args = ap.parse_args()
 
     set_seed(args.seed)
@@ -411,6 +518,17 @@ def main():
         torch.onnx.export(model, inputs, onnx_path, opset_version=13, input_names=input_names,
                           output_names=["bodyfat"], dynamic_axes=dynamic_axes)
         print(f"Exported ONNX to {onnx_path}")
+
+        if args.optimize_onnx or args.quantize:
+            variants = [("fp32", onnx_path)]
+            if args.optimize_onnx:
+                variants.append(("optimized", onnx_variant_path(onnx_path, "opt")))
+                optimize_onnx(onnx_path, variants[-1][1])
+            if args.quantize:
+                variants.append((f"int8-{args.quantize}", onnx_variant_path(onnx_path, "int8")))
+                quantize_onnx(onnx_path, variants[-1][1], args.quantize, calib_ds=val_ds,
+                              calib_samples=args.calib_samples)
+            compare_onnx_variants(variants, test_ds, args.out, threads=args.onnx_threads)
         return
 
     optimizer = torch.optim.AdamW(model.parameters(), lr=args.lr, betas=(0.9, 0.999), weight_decay=1e-4)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""데이터베이스 호환성 점검: 설정된 DATABASE_URL에서 주요 흐름을 실행
+
+Applies migrations to the database in ``DATABASE_URL`` and drives the main
+API flows against it (register, meal CRUD, daily summaries, pagination,
+custom food search, concurrent creation of the same day's summary). Use it
+to check a PostgreSQL deployment before pointing API nodes at it. It writes
+test users and meals, so run it against a scratch database:
+
+    createdb fatfit_check
+    DATABASE_URL=postgresql+psycopg2://localhost/fatfit_check \
+        python app/scripts/check_database.py
+
+Requires ``httpx`` for FastAPI's TestClient. Exits 1 on the first failure.
+"""
+
+import argparse
+import datetime as dt
+import sys
+import threading
+import uuid
+from pathlib import Path
+
+# backend/app/scripts/에서 실행되므로 backend 디렉토리를 경로에 추가
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import DATABASE_URL, SessionLocal, get_session
+from app.main import app
+from app.migrations import run_migrations
+from app.services.daily_summary import DailySummaryService
+from app.services.food_search import custom_foods_statement
+
+
+class CheckFailed(Exception):
+    pass
+
+
+def _expect(condition: bool, message: str) -> None:
+    if not condition:
+        raise CheckFailed(message)
+
+
+def _meal_payload(name: str, date: dt.date, calories: float) -> dict:
+    return {
+        "name": name,
+        "date": date.isoformat(),
+        "items": [
+            {
+                "name": f"{name} item",
+                "nutrition": {"calories": calories, "protein": 10.0, "carbs": 20.0, "fat": 5.0},
+            }
+        ],
+    }
+
+
+def check_api_flows(client: TestClient) -> None:
+    email = f"dbcheck-{uuid.uuid4().hex[:12]}@example.com"
+    response = client.post("/auth/register", json={"email": email, "password": "check-password"})
+    _expect(response.status_code == 201, f"register failed: {response.text}")
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+
+    today = dt.date.today()
+    yesterday = today - dt.timedelta(days=1)
+    meal_ids = []
+    for index in range(3):
+        response = client.post("/meals", json=_meal_payload(f"meal {index}", today, 100.0), headers=headers)
+        _expect(response.status_code == 201, f"create meal failed: {response.text}")
+        meal_ids.append(response.json()["id"])
+
+    summary = client.get("/dashboard", headers=headers).json()["summary"]
+    _expect(summary["total_calories"] == 300.0, f"dashboard total {summary['total_calories']} != 300")
+
+    response = client.patch(f"/meals/{meal_ids[0]}", json={"date": yesterday.isoformat()}, headers=headers)
+    _expect(response.status_code == 200, f"move meal failed: {response.text}")
+    summaries = client.get(
+        "/summaries", params={"start": yesterday.isoformat(), "end": today.isoformat()}, headers=headers
+    ).json()
+    _expect(
+        [row["total_calories"] for row in summaries] == [100.0, 200.0],
+        f"summary range after move: {summaries}",
+    )
+
+    response = client.get("/meals/recent", params={"limit": 2}, headers=headers)
+    _expect(len(response.json()) == 2, "first page of recent meals should have 2 meals")
+    cursor = response.headers.get("X-Next-Cursor")
+    _expect(cursor is not None, "missing X-Next-Cursor on a full page")
+    response = client.get("/meals/recent", params={"limit": 2, "cursor": cursor}, headers=headers)
+    _expect(len(response.json()) == 1, "second page of recent meals should have 1 meal")
+
+    response = client.post("/foods", json={"name": "DbCheck Granola", "calories": 120.0}, headers=headers)
+    _expect(response.status_code == 201, f"create food failed: {response.text}")
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+    with get_session() as session:
+        # ``ilike`` must match case-insensitively on every backend.
+        names = [item.name for item in session.scalars(custom_foods_statement("dbcheck gRANola", user_id, 5))]
+    _expect(names == ["DbCheck Granola"], f"custom food search returned {names}")
+
+    for meal_id in meal_ids:
+        response = client.delete(f"/meals/{meal_id}", headers=headers)
+        _expect(response.status_code == 204, f"delete meal failed: {response.text}")
+    summary = client.get("/dashboard", headers=headers).json()["summary"]
+    _expect(summary["total_calories"] == 0.0, f"dashboard total after delete {summary['total_calories']}")
+    print("  API flows: ok")
+
+
+def check_concurrent_summary_creation(threads: int) -> None:
+    with get_session() as session:
+        user = models.User(email=f"dbcheck-{uuid.uuid4().hex[:12]}@example.com", password_hash="x")
+        session.add(user)
+        session.flush()
+        user_id = user.id
+    date = dt.date.today() + dt.timedelta(days=1)
+
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def _worker() -> None:
+        session = SessionLocal()
+        try:
+            user = session.get(models.User, user_id)
+            barrier.wait()
+            DailySummaryService(session)._ensure(user, date)
+            session.commit()
+        except Exception as exc:  # noqa: BLE001 - reported below
+            session.rollback()
+            errors.append(exc)
+        finally:
+            session.close()
+
+    workers = [threading.Thread(target=_worker) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    _expect(not errors, f"concurrent summary creation raised: {errors[0]!r}" if errors else "")
+    with get_session() as session:
+        count = (
+            session.query(models.DailySummary)
+            .filter(models.DailySummary.user_id == user_id, models.DailySummary.date == date)
+            .count()
+        )
+    _expect(count == 1, f"expected one summary row, found {count}")
+    print(f"  concurrent summary creation ({threads} sessions): ok")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8, help="sessions racing to create one summary row")
+    args = parser.parse_args()
+
+    print(f"Database: {DATABASE_URL.render_as_string(hide_password=True)}")
+    try:
+        run_migrations()
+        with TestClient(app) as client:
+            check_api_flows(client)
+        check_concurrent_summary_creation(args.threads)
+    except CheckFailed as exc:
+        print(f"FAILED: {exc}")
+        sys.exit(1)
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""N+1 점검: 목록 엔드포인트의 SQL 문 수가 결과 개수와 무관한지 확인
+
+Counts the statements each request sends to the database (a
+``before_cursor_execute`` listener on every engine) for a user with one
+meal and for a user with ``--meals`` meals of several items each, and
+exits 1 if the counts differ. The meal tree is eager-loaded, so
+``/meals/recent`` should cost the same number of statements either way.
+
+Runs against a scratch SQLite database in a temporary directory:
+
+    python app/scripts/check_query_counts.py --meals 25
+"""
+
+import argparse
+import datetime as dt
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+# backend/app/scripts/에서 실행되므로 backend 디렉토리를 경로에 추가
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+# app.config가 읽기 전에 임시 데이터베이스를 지정
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='query-counts-')}/check.db"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.main import app
+
+ITEMS_PER_MEAL = 3
+
+# (name, path, params) of the list endpoints whose cost must not grow with the result.
+CHECKED_REQUESTS = [
+    ("recent meals", "/meals/recent", {"days": 7}),
+    ("dashboard", "/dashboard", {}),
+]
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def count(self, client: TestClient, path: str, params: dict, headers: dict) -> int:
+        # Warm-up request: fills the auth token cache so both users are measured alike.
+        client.get(path, params=params, headers=headers)
+        self.statements.clear()
+        response = client.get(path, params=params, headers=headers)
+        if response.status_code != 200:
+            raise SystemExit(f"GET {path} failed: {response.status_code} {response.text}")
+        return len(self.statements)
+
+
+def _register_with_meals(client: TestClient, meals: int) -> dict:
+    response = client.post(
+        "/auth/register", json={"email": f"counts-{uuid.uuid4().hex[:12]}@example.com", "password": "check-password"}
+    )
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    today = dt.date.today()
+    for index in range(meals):
+        payload = {
+            "name": f"meal {index}",
+            "date": today.isoformat(),
+            "items": [
+                {"name": f"item {item}", "nutrition": {"calories": 100.0, "protein": 5.0, "carbs": 10.0, "fat": 2.0}}
+                for item in range(ITEMS_PER_MEAL)
+            ],
+        }
+        response = client.post("/meals", json=payload, headers=headers)
+        if response.status_code != 201:
+            raise SystemExit(f"create meal failed: {response.text}")
+    return headers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meals", type=int, default=20, help="meals for the larger user")
+    args = parser.parse_args()
+
+    counter = StatementCounter()
+    failures = 0
+    with TestClient(app) as client:
+        one = _register_with_meals(client, 1)
+        many = _register_with_meals(client, args.meals)
+        event.listen(Engine, "before_cursor_execute", counter)
+        try:
+            for name, path, params in CHECKED_REQUESTS:
+                single = counter.count(client, path, params, one)
+                multiple = counter.count(client, path, params, many)
+                failed = single != multiple
+                failures += int(failed)
+                print(f"[{'FAIL' if failed else ' OK '}] {name}: 1 meal {single} statements, {args.meals} meals {multiple}")
+                if failed:
+                    print("\n".join(f"        {statement.splitlines()[0]}" for statement in counter.statements))
+        finally:
+            event.remove(Engine, "before_cursor_execute", counter)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
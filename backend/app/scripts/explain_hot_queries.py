@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Hot query 실행 계획 점검: 모든 per-user 조회가 인덱스를 사용하는지 확인
+
+Runs ``EXPLAIN QUERY PLAN`` for the queries issued by the busiest endpoints
+and exits non-zero if any of them falls back to a full table scan, or if a
+query in ``INDEX_ORDERED_QUERIES`` sorts its rows instead of reading them in
+index order.
+"""
+
+import datetime as dt
+import sys
+from pathlib import Path
+
+# backend/app/scripts/에서 실행되므로 backend 디렉토리를 경로에 추가
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import create_engine, select, text
+
+from app import models
+from app.database import Base
+
+TODAY = dt.date(2024, 1, 1)
+
+HOT_QUERIES = {
+    "dashboard meals": select(models.Meal).where(
+        models.Meal.user_id == 1, models.Meal.date == TODAY
+    ).order_by(models.Meal.id.desc()),
+    "recent meals page": select(models.Meal).where(
+        models.Meal.user_id == 1, models.Meal.date >= TODAY
+    ).order_by(models.Meal.date.desc(), models.Meal.id.desc()).limit(201),
+    "meal items by meal": select(models.MealItem).where(models.MealItem.meal_id.in_([1, 2, 3])),
+    "food entries by item": select(models.FoodEntry).where(models.FoodEntry.meal_item_id.in_([1, 2, 3])),
+    "daily summary": select(models.DailySummary).where(
+        models.DailySummary.user_id == 1, models.DailySummary.date == TODAY
+    ),
+    "summary range": select(models.DailySummary).where(
+        models.DailySummary.user_id == 1,
+        models.DailySummary.date >= TODAY,
+        models.DailySummary.date <= TODAY + dt.timedelta(days=30),
+    ),
+    "weight logs": select(models.WeightLog).where(
+        models.WeightLog.user_id == 1, models.WeightLog.date <= TODAY
+    ).order_by(models.WeightLog.date.desc()).limit(2),
+    "workouts page": select(models.WorkoutLog).where(
+        models.WorkoutLog.user_id == 1
+    ).order_by(models.WorkoutLog.date.desc(), models.WorkoutLog.id.desc()).limit(201),
+    "body fat analyses": select(models.BodyFatAnalysis).where(
+        models.BodyFatAnalysis.user_id == 1
+    ).order_by(models.BodyFatAnalysis.date.desc(), models.BodyFatAnalysis.id.desc()),
+    "session by token": select(models.SessionToken).where(models.SessionToken.token == "t"),
+    "sessions by user": select(models.SessionToken).where(models.SessionToken.user_id == 1),
+}
+
+
+# Paged or per-day listings whose ORDER BY must come from the index: a sort
+# reads the whole range before LIMIT applies. For meals this is what
+# ix_meals_user_date adds over uq_meal_user_date_name, whose name column
+# sits between date and the rowid.
+INDEX_ORDERED_QUERIES = {"dashboard meals", "recent meals page", "workouts page"}
+
+
+def _uses_sort(plan_rows) -> bool:
+    return any(row[-1].startswith("USE TEMP B-TREE") for row in plan_rows)
+
+
+def _uses_full_scan(plan_rows) -> bool:
+    for row in plan_rows:
+        detail = row[-1]
+        if detail.startswith("SCAN") and "USING" not in detail:
+            return True
+    return False
+
+
+def main() -> int:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    failures = 0
+    with engine.connect() as conn:
+        for name, query in HOT_QUERIES.items():
+            sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+            failed = _uses_full_scan(plan) or (name in INDEX_ORDERED_QUERIES and _uses_sort(plan))
+            failures += int(failed)
+            print(f"[{'FAIL' if failed else ' OK '}] {name}")
+            for row in plan:
+                print(f"        {row[-1]}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""스키마 마이그레이션 실행: 적용되지 않은 버전을 순서대로 적용
+
+Usage:
+    python app/scripts/migrate.py           # apply pending migrations
+    python app/scripts/migrate.py status    # list applied / pending versions
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# backend/app/scripts/에서 실행되므로 backend 디렉토리를 경로에 추가
+backend_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.migrations import MIGRATIONS, applied_versions, run_migrations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", choices=("upgrade", "status"), default="upgrade")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "status":
+        applied = applied_versions()
+        for item in MIGRATIONS:
+            state = f"applied {applied[item.version]:%Y-%m-%d %H:%M}" if item.version in applied else "pending"
+            print(f"{item.version:>4}  {state:<24}  {item.description}")
+        return
+
+    versions = run_migrations()
+    if versions:
+        print(f"Applied migrations: {', '.join(str(v) for v in versions)}")
+    else:
+        print("Schema is up to date.")
+
+
+if __name__ == "__main__":
+    main()
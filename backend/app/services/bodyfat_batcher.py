@@ -0,0 +1,126 @@
+"""Micro-batching queue in front of the body-fat model.
+
+Concurrent uploads are decoded in parallel on the thread pool and then
+queued here. A single worker task takes the first waiting request,
+collects more for up to ``max_wait_ms`` or until ``max_batch_size``, and
+runs them as one forward pass (the ONNX export has a dynamic batch
+axis). Each caller's future receives its own prediction. Batches run one
+at a time on a dedicated thread; onnxruntime spreads each one over the
+cores, and the next batch fills up meanwhile.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from .. import config
+from .bodyfat_inference import BodyFatMetadata, BodyFatModel, ImageSource, get_model, np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Request:
+    image: "np.ndarray"
+    meta: "np.ndarray"
+    future: asyncio.Future
+
+
+class InferenceBatcher:
+    def __init__(
+        self,
+        max_batch_size: int,
+        max_wait_ms: float,
+        model_loader: Callable[[], Optional[BodyFatModel]] = get_model,
+    ):
+        self.model_loader = model_loader
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.batches = 0
+        self.requests = 0
+
+    async def predict(self, image: ImageSource, metadata: Optional[BodyFatMetadata] = None) -> Optional[float]:
+        """Body-fat percentage for *image*, or ``None`` without a model."""
+
+        loop = asyncio.get_running_loop()
+        model = await loop.run_in_executor(None, self.model_loader)
+        if model is None:
+            return None
+        pixels = await loop.run_in_executor(None, model.preprocess, image)
+        request = _Request(pixels, model.meta_vector(metadata), loop.create_future())
+        self._ensure_worker(model)
+        await self._queue.put(request)
+        return await request.future
+
+    def _ensure_worker(self, model: BodyFatModel) -> None:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bodyfat-batch")
+            self._worker = asyncio.get_running_loop().create_task(self._run(model), name="bodyfat-batcher")
+
+    async def _collect(self) -> List[_Request]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Callers that gave up (client disconnected) are dropped.
+        return [request for request in batch if not request.future.done()]
+
+    async def _run(self, model: BodyFatModel) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+            try:
+                predictions = await loop.run_in_executor(self._executor, self._infer, model, batch)
+            except Exception as exc:
+                logger.exception("Body-fat batch of %d failed", len(batch))
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            for request, prediction in zip(batch, predictions):
+                if not request.future.done():
+                    request.future.set_result(float(prediction))
+
+    @staticmethod
+    def _infer(model: BodyFatModel, batch: List[_Request]) -> "np.ndarray":
+        images = np.stack([request.image for request in batch])
+        metas = np.stack([request.meta for request in batch]) if model.meta_cols else None
+        return model.predict_batch(images, metas)
+
+    async def stop(self) -> None:
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+bodyfat_batcher = InferenceBatcher(config.BODYFAT_BATCH_MAX_SIZE, config.BODYFAT_BATCH_MAX_WAIT_MS)
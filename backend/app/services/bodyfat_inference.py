@@ -0,0 +1,161 @@
+"""Body-fat estimation with the ONNX export of ``scripts/bodyfat_model.py``.
+
+The model is loaded once per process, on first use, into an onnxruntime
+CPU session. Preprocessing mirrors the training pipeline: RGB in [0, 1]
+resized to the exported input size. ``ViTBFModel.forward`` resizes to the
+backbone size and normalizes inside the graph, so that part is not
+repeated here.
+
+onnxruntime, numpy and Pillow are optional. Without them, or without a
+model file at ``BODYFAT_MODEL_PATH``, :func:`predict_body_fat` returns
+``None`` and analyses are marked failed.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+from .. import config, models
+
+try:
+    import numpy as np
+    import onnxruntime as ort
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - inference extras not installed
+    np = ort = Image = ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+ImageSource = Union[str, Path]
+
+
+@dataclass(frozen=True)
+class BodyFatMetadata:
+    """Profile inputs of models trained with ``--use-meta``."""
+
+    sex: Optional[str] = None
+    age: Optional[float] = None
+    height_cm: Optional[float] = None
+    weight_kg: Optional[float] = None
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "BodyFatMetadata":
+        return cls(sex=user.gender, age=user.age, height_cm=user.height_cm, weight_kg=user.weight_kg)
+
+    def value(self, column: str) -> float:
+        raw = getattr(self, column, None)
+        # Same encoding as BodyFatDataset._build_meta: male = 1, anything else 0.
+        if column == "sex" and isinstance(raw, str):
+            return 1.0 if raw.strip().upper() in ("M", "MALE", "1") else 0.0
+        try:
+            return float(raw)
+        except (TypeError, ValueError):
+            return 0.0
+
+
+class BodyFatModel:
+    """An onnxruntime CPU session around the exported ``ViTBFModel``."""
+
+    def __init__(self, model_path: str, meta_cols: Sequence[str], intra_op_threads: int = 0):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+        inputs = {item.name: item for item in self.session.get_inputs()}
+        self.output_name = self.session.get_outputs()[0].name
+        _, _, height, width = inputs["image"].shape
+        # The export fixes H/W to --img-size; fall back to the config if symbolic.
+        self.image_size = (
+            width if isinstance(width, int) else config.BODYFAT_IMAGE_SIZE,
+            height if isinstance(height, int) else config.BODYFAT_IMAGE_SIZE,
+        )
+        self.meta_cols: List[str] = []
+        if "meta" in inputs:
+            self.meta_cols = list(meta_cols)
+            meta_dim = inputs["meta"].shape[1]
+            if isinstance(meta_dim, int) and meta_dim != len(self.meta_cols):
+                raise ValueError(
+                    f"Model expects {meta_dim} metadata inputs, BODYFAT_MODEL_META_COLS has {len(self.meta_cols)}"
+                )
+
+    def preprocess(self, image: ImageSource) -> "np.ndarray":
+        """``[3, H, W]`` float32 RGB in [0, 1], like ``BodyFatDataset`` at eval time."""
+
+        with Image.open(image) as raw:
+            # cv2.imread (used in training) applies the EXIF orientation; Pillow does not.
+            rgb = ImageOps.exif_transpose(raw).convert("RGB")
+            resized = rgb.resize(self.image_size, Image.BILINEAR)
+        array = np.asarray(resized, dtype=np.float32) / 255.0
+        return np.ascontiguousarray(array.transpose(2, 0, 1))
+
+    def meta_vector(self, metadata: Optional[BodyFatMetadata]) -> "np.ndarray":
+        metadata = metadata or BodyFatMetadata()
+        return np.array([metadata.value(column) for column in self.meta_cols], dtype=np.float32)
+
+    def predict_batch(self, images: "np.ndarray", metas: Optional["np.ndarray"] = None) -> "np.ndarray":
+        """Predictions for ``[N, 3, H, W]`` images (and ``[N, meta_dim]`` metadata)."""
+
+        feeds = {"image": images}
+        if self.meta_cols:
+            feeds["meta"] = metas if metas is not None else np.zeros((len(images), len(self.meta_cols)), np.float32)
+        (output,) = self.session.run([self.output_name], feeds)
+        return np.clip(output.reshape(-1), 0.0, 100.0)
+
+    def predict(self, image: ImageSource, metadata: Optional[BodyFatMetadata] = None) -> float:
+        images = self.preprocess(image)[np.newaxis]
+        metas = self.meta_vector(metadata)[np.newaxis] if self.meta_cols else None
+        return float(self.predict_batch(images, metas)[0])
+
+
+_LOCK = threading.Lock()
+_MODEL: Optional[BodyFatModel] = None
+_LOAD_ATTEMPTED = False
+
+
+def get_model() -> Optional[BodyFatModel]:
+    """The process-wide model, loaded on first call; ``None`` if unavailable."""
+
+    global _MODEL, _LOAD_ATTEMPTED
+    if _LOAD_ATTEMPTED:
+        return _MODEL
+    with _LOCK:
+        if not _LOAD_ATTEMPTED:
+            _MODEL = _load_model()
+            _LOAD_ATTEMPTED = True
+    return _MODEL
+
+
+def _load_model() -> Optional[BodyFatModel]:
+    if ort is None:
+        logger.warning("Body-fat model disabled: install numpy, Pillow and onnxruntime")
+        return None
+    model_path = Path(config.BODYFAT_MODEL_PATH)
+    if not model_path.exists():
+        logger.warning("Body-fat model disabled: %s not found", model_path)
+        return None
+    meta_cols = [column.strip() for column in config.BODYFAT_MODEL_META_COLS.split(",") if column.strip()]
+    try:
+        model = BodyFatModel(str(model_path), meta_cols, config.BODYFAT_INTRA_OP_THREADS)
+    except Exception:
+        logger.exception("Failed to load body-fat model from %s", model_path)
+        return None
+    logger.info("Loaded body-fat model %s (input %sx%s)", model_path, *model.image_size)
+    return model
+
+
+def predict_body_fat(image: ImageSource, metadata: Optional[BodyFatMetadata] = None) -> Optional[float]:
+    """Estimated body-fat percentage for *image*, or ``None`` without a model.
+
+    Blocking (decode plus a ViT forward pass); call it off the event loop.
+    """
+
+    model = get_model()
+    if model is None:
+        return None
+    return model.predict(image, metadata)
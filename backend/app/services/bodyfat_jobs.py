@@ -0,0 +1,152 @@
+"""Background body-fat analysis jobs.
+
+``POST /body-fat/analyze`` stores the image and a ``pending`` analysis
+and returns at once. The job runner predicts the percentage off the
+request path and then marks the row ``completed`` with the percentage and its
+percentile rank among the labelled dataset (``services/bodyfat_reference``),
+or ``failed`` with an ``error_message`` (prediction error, or no model
+available); clients poll ``GET /body-fat/analyses/{id}``.
+
+With ``BODYFAT_WORKER_PROCESSES`` > 0 the prediction runs on a spawned
+process pool, each worker loading the model once, so inference can use
+its own cores without competing with the API for the GIL. With 0 it runs
+in-process through the micro-batching queue. Rows still pending at
+startup (the process stopped mid-job) are picked up again; with several
+API processes a row may be picked up twice, which only repeats the work.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Set, Tuple
+
+from .. import config, models
+from ..database import get_session
+from .bodyfat_batcher import bodyfat_batcher
+from .bodyfat_inference import BodyFatMetadata, get_model, predict_body_fat
+from .bodyfat_reference import body_fat_percentile_rank
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+COMPLETED = "completed"
+FAILED = "failed"
+
+def _init_worker() -> None:
+    get_model()
+
+
+def _predict_in_worker(image_path: str, metadata: BodyFatMetadata) -> Optional[float]:
+    return predict_body_fat(image_path, metadata)
+
+
+MODEL_UNAVAILABLE_MESSAGE = "Body-fat model is not available"
+PREDICTION_FAILED_MESSAGE = "Body-fat analysis failed"
+
+
+def _finish(
+    analysis_id: int,
+    status: str,
+    body_fat_percentage: Optional[float] = None,
+    percentile_rank: Optional[float] = None,
+    error_message: Optional[str] = None,
+) -> None:
+    with get_session() as session:
+        analysis = session.get(models.BodyFatAnalysis, analysis_id)
+        if analysis is None:  # deleted while the job ran
+            return
+        analysis.status = status
+        analysis.body_fat_percentage = body_fat_percentage
+        analysis.percentile_rank = percentile_rank
+        analysis.error_message = error_message
+
+
+def _pending_jobs() -> List[Tuple[int, str, BodyFatMetadata]]:
+    with get_session() as session:
+        rows = (
+            session.query(models.BodyFatAnalysis, models.User)
+            .join(models.User, models.User.id == models.BodyFatAnalysis.user_id)
+            .filter(models.BodyFatAnalysis.status == PENDING)
+            .order_by(models.BodyFatAnalysis.id)
+            .all()
+        )
+        return [
+            (analysis.id, os.path.join(config.UPLOADS_DIR, analysis.image_path), BodyFatMetadata.from_user(user))
+            for analysis, user in rows
+        ]
+
+
+class BodyFatJobRunner:
+    def __init__(self, worker_processes: int):
+        self.worker_processes = worker_processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.worker_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._executor
+
+    def submit(self, analysis_id: int, image_path: str, metadata: BodyFatMetadata) -> None:
+        """Start analysing *image_path*; the result is written to the analysis row."""
+
+        task = asyncio.get_running_loop().create_task(self._run(analysis_id, image_path, metadata))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _predict(self, image_path: str, metadata: BodyFatMetadata) -> Optional[float]:
+        if self.worker_processes > 0:
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self._get_executor(), _predict_in_worker, image_path, metadata)
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); start a fresh pool for later jobs.
+                self._executor = None
+                raise
+        return await bodyfat_batcher.predict(image_path, metadata)
+
+    async def _run(self, analysis_id: int, image_path: str, metadata: BodyFatMetadata) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            body_fat_percentage = await self._predict(image_path, metadata)
+        except Exception:
+            logger.exception("Body-fat analysis %d failed", analysis_id)
+            await loop.run_in_executor(None, _finish, analysis_id, FAILED, None, None, PREDICTION_FAILED_MESSAGE)
+            return
+        if body_fat_percentage is None:
+            await loop.run_in_executor(None, _finish, analysis_id, FAILED, None, None, MODEL_UNAVAILABLE_MESSAGE)
+            return
+        percentile_rank = await loop.run_in_executor(None, body_fat_percentile_rank, body_fat_percentage, metadata)
+        await loop.run_in_executor(None, _finish, analysis_id, COMPLETED, body_fat_percentage, percentile_rank)
+
+    async def recover(self) -> int:
+        """Resubmit analyses left pending by a previous process; returns how many."""
+
+        jobs = await asyncio.get_running_loop().run_in_executor(None, _pending_jobs)
+        for analysis_id, image_path, metadata in jobs:
+            self.submit(analysis_id, image_path, metadata)
+        if jobs:
+            logger.info("Resubmitted %d pending body-fat analyses", len(jobs))
+        return len(jobs)
+
+    async def stop(self) -> None:
+        # Unfinished rows stay pending and are recovered on the next start.
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+bodyfat_jobs = BodyFatJobRunner(config.BODYFAT_WORKER_PROCESSES)
@@ -0,0 +1,109 @@
+"""Percentile rank of a body-fat estimate against the labelled dataset.
+
+The reference is the ``bodyfat`` column of ``BODYFAT_REFERENCE_CSV`` (the
+training labels, ``data/body_fat/bfp_labels.csv``). An estimate is ranked
+among the rows of the user's sex and, when that leaves at least
+``MIN_GROUP_SIZE`` rows, of the same ten-year age band; rows with an
+unknown sex or age are only used by the wider groups. The rank is the
+share of the group below the estimate, counting ties as half.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from .. import config
+from .bodyfat_inference import BodyFatMetadata
+
+logger = logging.getLogger(__name__)
+
+# 연령대로 좁혔을 때 이보다 적으면 성별 전체로 계산
+MIN_GROUP_SIZE = 20
+AGE_BAND_YEARS = 10
+
+
+@dataclass(frozen=True)
+class _ReferenceRow:
+    body_fat: float
+    sex: Optional[str]
+    age: Optional[float]
+
+
+def _sex_key(raw) -> Optional[str]:
+    # Same encodings as BodyFatDataset._build_meta ("M"/"F" or 1/0) and User.gender.
+    value = str(raw).strip().upper() if raw is not None else ""
+    if value in ("M", "MALE", "1"):
+        return "M"
+    if value in ("F", "FEMALE", "0"):
+        return "F"
+    return None
+
+
+def _float_or_none(raw) -> Optional[float]:
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+_LOCK = threading.Lock()
+_ROWS: Optional[List[_ReferenceRow]] = None
+
+
+def _reference_rows() -> List[_ReferenceRow]:
+    global _ROWS
+    if _ROWS is None:
+        with _LOCK:
+            if _ROWS is None:
+                _ROWS = _load_rows(Path(config.BODYFAT_REFERENCE_CSV))
+    return _ROWS
+
+
+def _load_rows(path: Path) -> List[_ReferenceRow]:
+    if not path.exists():
+        logger.warning("Body-fat percentile disabled: %s not found", path)
+        return []
+    rows = []
+    with path.open(newline="") as handle:
+        for record in csv.DictReader(handle):
+            body_fat = _float_or_none(record.get("bodyfat"))
+            if body_fat is None:
+                continue
+            rows.append(_ReferenceRow(body_fat, _sex_key(record.get("sex")), _float_or_none(record.get("age"))))
+    logger.info("Loaded %d body-fat reference rows from %s", len(rows), path)
+    return rows
+
+
+def _reference_group(metadata: BodyFatMetadata) -> List[_ReferenceRow]:
+    rows = _reference_rows()
+    sex = _sex_key(metadata.sex)
+    if sex is not None:
+        same_sex = [row for row in rows if row.sex == sex]
+        # Without rows for the user's sex, rank against everyone rather than not at all.
+        rows = same_sex or rows
+    if metadata.age is not None:
+        band = int(metadata.age) // AGE_BAND_YEARS
+        same_band = [row for row in rows if row.age is not None and int(row.age) // AGE_BAND_YEARS == band]
+        if len(same_band) >= MIN_GROUP_SIZE:
+            rows = same_band
+    return rows
+
+
+def body_fat_percentile_rank(body_fat_percentage: float, metadata: BodyFatMetadata) -> Optional[float]:
+    """Percentile (0-100) of *body_fat_percentage* among comparable reference rows.
+
+    ``None`` without reference data. Reads the CSV on first call; call it
+    off the event loop.
+    """
+
+    group = _reference_group(metadata)
+    if not group:
+        return None
+    below = sum(1 for row in group if row.body_fat < body_fat_percentage)
+    equal = sum(1 for row in group if row.body_fat == body_fat_percentage)
+    return round((below + 0.5 * equal) * 100.0 / len(group), 1)
@@ -0,0 +1,169 @@
+"""Change feed for incremental client sync (``GET /changes``).
+
+An ``after_flush`` hook on every ORM session appends one ``change_log``
+row per changed meal, workout, weight log or body-fat analysis, in the same
+transaction as the change. Meal items and food entries are reported as a
+change of their meal, because clients store meals as whole trees. Deletes
+become tombstones.
+
+The sequence is the ``change_log`` primary key. SQLite commits writers one
+at a time, so ids become visible in order. On a server database, two
+concurrent writers can commit their ids out of order, so the feed only
+serves entries older than ``CHANGE_FEED_VISIBILITY_SECONDS``: by then every
+transaction that took a lower id has committed (or rolled back), and a
+cursor never moves past an id that is still invisible.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, selectinload
+
+from .. import config, models, schemas
+from ..pagination import clamp_page_size
+
+# Models with their own change-feed entries, keyed to the feed's entity type.
+TRACKED_ENTITIES = {
+    models.Meal: "meal",
+    models.WorkoutLog: "workout",
+    models.WeightLog: "weight",
+    models.BodyFatAnalysis: "body_fat_analysis",
+}
+
+_ChangeKey = Tuple[str, int]
+
+
+@event.listens_for(Session, "after_flush")
+def _record_changes(session: Session, flush_context) -> None:
+    changes: Dict[_ChangeKey, Tuple[int, bool]] = {}
+    item_meal_ids: Set[int] = set()
+    entry_item_ids: Set[int] = set()
+
+    for obj, deleted in _flushed_objects(session):
+        entity_type = TRACKED_ENTITIES.get(type(obj))
+        if entity_type is not None:
+            key = (entity_type, obj.id)
+            # A delete wins over an update of the same record in one flush.
+            if deleted or key not in changes:
+                changes[key] = (obj.user_id, deleted)
+        elif isinstance(obj, models.MealItem) and obj.meal_id is not None:
+            item_meal_ids.add(obj.meal_id)
+        elif isinstance(obj, models.FoodEntry) and obj.meal_item_id is not None:
+            entry_item_ids.add(obj.meal_item_id)
+
+    connection = session.connection()
+    if entry_item_ids:
+        item_meal_ids.update(
+            connection.execute(
+                select(models.MealItem.meal_id).where(models.MealItem.id.in_(entry_item_ids))
+            ).scalars()
+        )
+    item_meal_ids -= {entity_id for entity_type, entity_id in changes if entity_type == "meal"}
+    if item_meal_ids:
+        # Meals deleted in this flush are already gone and carry their own tombstone.
+        for meal_id, user_id in connection.execute(
+            select(models.Meal.id, models.Meal.user_id).where(models.Meal.id.in_(item_meal_ids))
+        ):
+            changes[("meal", meal_id)] = (user_id, False)
+
+    if changes:
+        connection.execute(
+            models.ChangeLogEntry.__table__.insert(),
+            [
+                {"user_id": user_id, "entity_type": entity_type, "entity_id": entity_id, "deleted": deleted}
+                for (entity_type, entity_id), (user_id, deleted) in changes.items()
+            ],
+        )
+
+
+def _flushed_objects(session: Session) -> Iterable[Tuple[object, bool]]:
+    for obj in session.new:
+        yield obj, False
+    for obj in session.dirty:
+        yield obj, False
+    for obj in session.deleted:
+        yield obj, True
+
+
+class ChangeFeedService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def changes_since(self, user: models.User, since: int, limit: Optional[int]) -> schemas.ChangeFeedOut:
+        """Current state of every record changed after sequence *since*.
+
+        Reads at most *limit* log entries. A record changed several times
+        in that window is returned once, in its latest state.
+        """
+
+        page_size = clamp_page_size(limit)
+        query = self.db.query(models.ChangeLogEntry).filter(
+            models.ChangeLogEntry.user_id == user.id, models.ChangeLogEntry.id > since
+        )
+        horizon = self._visibility_horizon()
+        if horizon is not None:
+            query = query.filter(models.ChangeLogEntry.changed_at < horizon)
+        entries = (
+            query.order_by(models.ChangeLogEntry.id)
+            .limit(page_size + 1)
+            .all()
+        )
+        has_more = len(entries) > page_size
+        entries = entries[:page_size]
+
+        latest: "OrderedDict[_ChangeKey, bool]" = OrderedDict()
+        for entry in entries:
+            key = (entry.entity_type, entry.entity_id)
+            latest.pop(key, None)
+            latest[key] = entry.deleted
+
+        live_ids: Dict[str, List[int]] = {entity_type: [] for entity_type in TRACKED_ENTITIES.values()}
+        deleted: List[schemas.DeletedRecordOut] = []
+        for (entity_type, entity_id), is_deleted in latest.items():
+            if is_deleted:
+                deleted.append(schemas.DeletedRecordOut(type=entity_type, id=entity_id))
+            else:
+                live_ids[entity_type].append(entity_id)
+
+        meals = self._load(
+            models.Meal,
+            user,
+            live_ids["meal"],
+            selectinload(models.Meal.items).selectinload(models.MealItem.food_entries),
+        )
+        workouts = self._load(models.WorkoutLog, user, live_ids["workout"])
+        weight_logs = self._load(models.WeightLog, user, live_ids["weight"])
+        analyses = self._load(models.BodyFatAnalysis, user, live_ids["body_fat_analysis"])
+
+        # A record deleted after the last entry of this page is gone already;
+        # the tombstone follows on a later page, so it is simply left out here.
+        return schemas.ChangeFeedOut(
+            cursor=entries[-1].id if entries else since,
+            has_more=has_more,
+            meals=meals,
+            workouts=workouts,
+            weight_logs=weight_logs,
+            body_fat_analyses=analyses,
+            deleted=deleted,
+        )
+
+    def _visibility_horizon(self) -> Optional[dt.datetime]:
+        # ``changed_at`` is stamped at flush time, before the entry's transaction commits.
+        if self.db.get_bind().dialect.name == "sqlite" or config.CHANGE_FEED_VISIBILITY_SECONDS <= 0:
+            return None
+        return dt.datetime.utcnow() - dt.timedelta(seconds=config.CHANGE_FEED_VISIBILITY_SECONDS)
+
+    def _load(self, model, user: models.User, ids: List[int], *options) -> list:
+        if not ids:
+            return []
+        return (
+            self.db.query(model)
+            .options(*options)
+            .filter(model.id.in_(ids), model.user_id == user.id)
+            .order_by(model.id)
+            .all()
+        )
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Query, Session
+
+from .. import models
+from .motivation import MotivationMessageService
+
+logger = logging.getLogger(__name__)
+
+# Dialect-specific INSERT constructs that support ``ON CONFLICT DO NOTHING``.
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+@dataclass
+class NutritionTotals:
+    """Calorie and macro totals for a set of food entries."""
+
+    calories: float = 0.0
+    protein: float = 0.0
+    carbs: float = 0.0
+    fat: float = 0.0
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[models.FoodEntry]) -> "NutritionTotals":
+        totals = cls()
+        for entry in entries:
+            totals.calories += entry.calories
+            totals.protein += entry.protein or 0.0
+            totals.carbs += entry.carbs or 0.0
+            totals.fat += entry.fat or 0.0
+        return totals
+
+    @classmethod
+    def from_item(cls, item: models.MealItem) -> "NutritionTotals":
+        return cls.from_entries(item.food_entries)
+
+    @classmethod
+    def from_meal(cls, meal: models.Meal) -> "NutritionTotals":
+        return cls.from_entries(entry for item in meal.items for entry in item.food_entries)
+
+    @classmethod
+    def from_row(cls, row: Tuple[float, float, float, float]) -> "NutritionTotals":
+        calories, protein, carbs, fat = row
+        return cls(calories=calories, protein=protein, carbs=carbs, fat=fat)
+
+    def __add__(self, other: "NutritionTotals") -> "NutritionTotals":
+        return NutritionTotals(
+            calories=self.calories + other.calories,
+            protein=self.protein + other.protein,
+            carbs=self.carbs + other.carbs,
+            fat=self.fat + other.fat,
+        )
+
+    def __neg__(self) -> "NutritionTotals":
+        return NutritionTotals(
+            calories=-self.calories,
+            protein=-self.protein,
+            carbs=-self.carbs,
+            fat=-self.fat,
+        )
+
+    def is_zero(self) -> bool:
+        return not (self.calories or self.protein or self.carbs or self.fat)
+
+    def matches(self, summary: models.DailySummary, tolerance: float) -> bool:
+        return (
+            abs(summary.total_calories - self.calories) <= tolerance
+            and abs(summary.total_protein - self.protein) <= tolerance
+            and abs(summary.total_carbs - self.carbs) <= tolerance
+            and abs(summary.total_fat - self.fat) <= tolerance
+        )
+
+
+class DailySummaryService:
+    """Maintains ``DailySummary`` rows incrementally as meals change.
+
+    Write paths call :meth:`apply_delta` with the nutrition that was added or
+    removed; read paths call :meth:`get`, which never writes.
+    """
+
+    TOLERANCE = 1e-6
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, user: models.User, date: dt.date) -> models.DailySummary:
+        """Return the stored summary, or an unsaved empty one for days without food."""
+
+        summary = self._find(user.id, date)
+        if summary is not None:
+            return summary
+
+        summary = self._empty(user, date)
+        MotivationMessageService(self.db).apply(user, summary)
+        return summary
+
+    def get_range(
+        self, user: models.User, start: dt.date, end: dt.date
+    ) -> List[models.DailySummary]:
+        """Stored summaries for every day in ``[start, end]`` in one query.
+
+        Days without a stored row are filled with unsaved zero summaries
+        (no message is selected for them).
+        """
+
+        stored = {
+            summary.date: summary
+            for summary in self.db.query(models.DailySummary).filter(
+                models.DailySummary.user_id == user.id,
+                models.DailySummary.date >= start,
+                models.DailySummary.date <= end,
+            )
+        }
+        summaries: List[models.DailySummary] = []
+        current = start
+        while current <= end:
+            summaries.append(stored.get(current) or self._empty(user, current))
+            current += dt.timedelta(days=1)
+        return summaries
+
+    def apply_delta(
+        self, user: models.User, date: dt.date, delta: NutritionTotals
+    ) -> models.DailySummary:
+        """Add *delta* to the stored totals for *date* and refresh its message.
+
+        Callers must have flushed the change that *delta* describes.
+        """
+
+        summary = self._find(user.id, date)
+        if summary is None:
+            # No baseline to apply the delta to; build it from the food log instead.
+            return self.recalculate(user, date)
+
+        # 합계는 SQL에서 증가시켜 동시 요청의 델타가 서로 덮어쓰지 않도록 한다.
+        table = models.DailySummary
+        self.db.execute(
+            update(table)
+            .where(table.id == summary.id)
+            .values(
+                total_calories=table.total_calories + delta.calories,
+                total_protein=table.total_protein + delta.protein,
+                total_carbs=table.total_carbs + delta.carbs,
+                total_fat=table.total_fat + delta.fat,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        self.db.refresh(summary)
+        MotivationMessageService(self.db).apply(user, summary)
+        return summary
+
+    def recalculate(self, user: models.User, date: dt.date) -> models.DailySummary:
+        """Rebuild the summary for *date* from the food log."""
+
+        self.db.flush()
+        totals = self._compute_totals(user.id, date)
+        summary = self._ensure(user, date)
+        self._store_totals(summary, totals)
+        self.db.flush()
+        MotivationMessageService(self.db).apply(user, summary)
+        return summary
+
+    def refresh_message(self, user: models.User, date: dt.date) -> Optional[models.DailySummary]:
+        """Re-select the message for a stored summary after profile/target changes."""
+
+        summary = self._find(user.id, date)
+        if summary is None:
+            return None
+        MotivationMessageService(self.db).apply(user, summary)
+        return summary
+
+    # ------------------------------------------------------------------
+    # Helpers
+
+    def _find(self, user_id: int, date: dt.date) -> Optional[models.DailySummary]:
+        return (
+            self.db.query(models.DailySummary)
+            .filter(models.DailySummary.user_id == user_id, models.DailySummary.date == date)
+            .first()
+        )
+
+    @staticmethod
+    def _empty(user: models.User, date: dt.date) -> models.DailySummary:
+        # Not attached to the session (no ``user=`` relationship), so it is never flushed.
+        return models.DailySummary(
+            user_id=user.id,
+            date=date,
+            total_calories=0.0,
+            total_protein=0.0,
+            total_carbs=0.0,
+            total_fat=0.0,
+        )
+
+    def _ensure(self, user: models.User, date: dt.date) -> models.DailySummary:
+        summary = self._find(user.id, date)
+        if summary is not None:
+            return summary
+
+        dialect = self.db.get_bind().dialect.name
+        if dialect not in _UPSERT_INSERTS:
+            summary = models.DailySummary(user=user, date=date)
+            self.db.add(summary)
+            self.db.flush()
+            return summary
+
+        # Requests on different API nodes can create the same day's row at
+        # once; let the unique constraint pick one instead of failing.
+        self.db.execute(
+            _UPSERT_INSERTS[dialect](models.DailySummary)
+            .values(user_id=user.id, date=date)
+            .on_conflict_do_nothing(index_elements=["user_id", "date"])
+        )
+        return self._find(user.id, date)
+
+    def _compute_totals(self, user_id: int, date: dt.date) -> NutritionTotals:
+        row = (
+            _totals_query(self.db, models.Meal.date)
+            .filter(models.Meal.user_id == user_id, models.Meal.date == date)
+            .group_by(models.Meal.date)
+            .first()
+        )
+        if row is None:
+            return NutritionTotals()
+        return NutritionTotals.from_row(row[1:])
+
+    def compute_totals_by_date(
+        self, user_id: int, start: dt.date, end: dt.date
+    ) -> Dict[dt.date, NutritionTotals]:
+        """Totals for every day in ``[start, end]`` that has food, in one query."""
+
+        rows = (
+            _totals_query(self.db, models.Meal.date)
+            .filter(
+                models.Meal.user_id == user_id,
+                models.Meal.date >= start,
+                models.Meal.date <= end,
+            )
+            .group_by(models.Meal.date)
+            .all()
+        )
+        return {row[0]: NutritionTotals.from_row(row[1:]) for row in rows}
+
+    @staticmethod
+    def _store_totals(summary: models.DailySummary, totals: NutritionTotals) -> None:
+        summary.total_calories = totals.calories
+        summary.total_protein = totals.protein
+        summary.total_carbs = totals.carbs
+        summary.total_fat = totals.fat
+
+
+def _totals_query(db: Session, *group_columns) -> Query:
+    """``SELECT <group_columns>, SUM(...)`` over food entries joined to their meal."""
+
+    return (
+        db.query(
+            *group_columns,
+            func.sum(models.FoodEntry.calories),
+            func.sum(func.coalesce(models.FoodEntry.protein, 0.0)),
+            func.sum(func.coalesce(models.FoodEntry.carbs, 0.0)),
+            func.sum(func.coalesce(models.FoodEntry.fat, 0.0)),
+        )
+        .select_from(models.FoodEntry)
+        .join(models.MealItem, models.MealItem.id == models.FoodEntry.meal_item_id)
+        .join(models.Meal, models.Meal.id == models.MealItem.meal_id)
+    )
+
+
+def reconcile_summaries(db: Session, lookback_days: int) -> int:
+    """Verify recent summaries against the food log and repair any drift.
+
+    Returns the number of summaries that were corrected or created.
+    """
+
+    start = dt.date.today() - dt.timedelta(days=lookback_days)
+    actual: Dict[Tuple[int, dt.date], NutritionTotals] = {
+        (row[0], row[1]): NutritionTotals.from_row(row[2:])
+        for row in (
+            _totals_query(db, models.Meal.user_id, models.Meal.date)
+            .filter(models.Meal.date >= start)
+            .group_by(models.Meal.user_id, models.Meal.date)
+            .all()
+        )
+    }
+    stored: Dict[Tuple[int, dt.date], models.DailySummary] = {
+        (summary.user_id, summary.date): summary
+        for summary in db.query(models.DailySummary).filter(models.DailySummary.date >= start)
+    }
+
+    service = DailySummaryService(db)
+    corrected = 0
+    for key in sorted(set(actual) | set(stored)):
+        user_id, date = key
+        totals = actual.get(key, NutritionTotals())
+        summary = stored.get(key)
+        if summary is None and totals.is_zero():
+            continue
+        if summary is not None and totals.matches(summary, service.TOLERANCE):
+            continue
+
+        user = db.get(models.User, user_id)
+        if user is None:
+            continue
+        logger.warning("Reconciling daily summary for user %s on %s", user_id, date)
+        summary = summary or service._ensure(user, date)
+        service._store_totals(summary, totals)
+        db.flush()
+        MotivationMessageService(db).apply(user, summary)
+        corrected += 1
+    return corrected
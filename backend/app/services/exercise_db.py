@@ -3,11 +3,14 @@
 Parquet 파일에서 운동 데이터를 로드하고 검색/칼로리 계산 제공
 """
 
+import logging
 import os
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
 # 데이터 파일 경로
 _EXERCISE_DB_PATH = Path(__file__).parent.parent / "data" / "exercise_db" / "exercise_data.parquet"
 _DF: Optional[pd.DataFrame] = None
@@ -145,6 +148,36 @@ def calculate_calories_burned(
     return max(0.0, total_kcal)
 
 
+def estimate_workout_calories(
+    activity_type: str,
+    duration_minutes: Optional[int],
+    weight_kg: Optional[float],
+) -> Optional[float]:
+    """운동 로그의 소모 칼로리 추정 (계산할 수 없으면 None)
+    
+    activity_type 형식: "Category - Exercise Name" 또는 "Exercise Name"
+    """
+    if not activity_type or not duration_minutes:
+        return None
+    try:
+        activity_parts = activity_type.split(" - ", 1)
+        if len(activity_parts) == 2:
+            category, exercise_name = activity_parts
+        else:
+            category = None
+            exercise_name = activity_type
+        
+        return calculate_calories_burned(
+            exercise_name=exercise_name,
+            duration_minutes=duration_minutes,
+            weight_kg=weight_kg or 70.0,
+            category=category,
+        )
+    except Exception as e:
+        logger.warning(f"Could not auto-calculate calories: {e}")
+        return None
+
+
 def get_categories() -> List[str]:
     """모든 운동 카테고리 목록 반환"""
     df = _load_exercise_db()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import Select, or_, select, update
+
+from .. import models, schemas
+from ..database import get_session
+from .usda_db import search_usda_foods
+
+PER_G_KEYS = ("kcal_per_g", "protein_per_g", "fat_per_g", "carb_per_g")
+
+
+def usda_search_entries(query: str, limit: int) -> List[Dict[str, Any]]:
+    """Search food_data.parquet and shape the hits like ``FoodItemOut``."""
+
+    entries: List[Dict[str, Any]] = []
+    for usda_food in search_usda_foods(query, limit=limit, include_micronutrients=False):
+        per_g_payload = {key: usda_food.get(key) for key in PER_G_KEYS}
+        entries.append({
+            "id": usda_food.get("fdc_id"),
+            "provider": "usda",
+            "provider_food_id": str(usda_food.get("fdc_id", "")),
+            "name": usda_food.get("description", ""),
+            "brand_name": usda_food.get("brand_owner"),
+            "serving_description": (
+                f"{usda_food.get('serving_size', '')} {usda_food.get('serving_size_unit', '')}".strip()
+                if usda_food.get("serving_size")
+                else None
+            ),
+            "calories": usda_food.get("kcal"),
+            "protein": usda_food.get("protein_g"),
+            "carbs": usda_food.get("carb_g"),
+            "fat": usda_food.get("fat_g"),
+            "created_by_user_id": None,
+            "last_refreshed": None,
+            **per_g_payload,
+        })
+    return entries
+
+
+def custom_foods_statement(query: str, user_id: int, limit: int) -> Select:
+    """User-created and shared custom foods matching *query*, most searched first."""
+
+    return (
+        select(models.FoodItem)
+        .where(
+            or_(
+                models.FoodItem.name.ilike(f"%{query}%"),
+                models.FoodItem.brand_name.ilike(f"%{query}%"),
+            )
+        )
+        .where(
+            or_(
+                models.FoodItem.created_by_user_id.is_(None),
+                models.FoodItem.created_by_user_id == user_id,
+            )
+        )
+        .where(models.FoodItem.provider != "usda")  # Exclude old USDA data
+        .order_by(models.FoodItem.search_count.desc(), models.FoodItem.updated_at.desc())
+        .limit(limit)
+    )
+
+
+def custom_food_entry(item: models.FoodItem) -> Dict[str, Any]:
+    return {
+        "id": item.id,
+        "provider": item.provider,
+        "provider_food_id": item.provider_food_id,
+        "name": item.name,
+        "brand_name": item.brand_name,
+        "serving_description": item.serving_description,
+        "calories": item.calories,
+        "protein": item.protein,
+        "carbs": item.carbs,
+        "fat": item.fat,
+        "created_by_user_id": item.created_by_user_id,
+        "last_refreshed": item.last_refreshed,
+        "kcal_per_g": None,
+        "protein_per_g": None,
+        "fat_per_g": None,
+        "carb_per_g": None,
+    }
+
+
+def record_food_searches(food_ids: Sequence[int]) -> None:
+    """Bump ``search_count`` for foods shown in search results.
+
+    Runs as a background task on a writer session after the response is
+    sent, so the search itself stays on the read-only session.
+    """
+
+    if not food_ids:
+        return
+    with get_session() as session:
+        session.execute(
+            update(models.FoodItem)
+            .where(models.FoodItem.id.in_(list(food_ids)))
+            .values(search_count=models.FoodItem.search_count + 1)
+        )
+
+
+def _clean_float(value: Any) -> Any:
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def build_search_response(
+    query: str, entries: List[Dict[str, Any]], limit: int
+) -> schemas.FoodSearchResponse:
+    response_models: List[schemas.FoodItemOut] = []
+    for entry in entries[:limit]:
+        cleaned_entry = {key: _clean_float(value) for key, value in entry.items()}
+        response_models.append(schemas.FoodItemOut.parse_obj(cleaned_entry))
+    return schemas.FoodSearchResponse(query=query, results=response_models)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import datetime as dt
+
+from .. import models, schemas
+
+
+def build_meal(meal_in: schemas.MealCreate, user_id: int, date: dt.date) -> models.Meal:
+    """Build a meal with its items and food entries as one unsaved object tree.
+
+    Adding the meal cascades to the items and entries, so a single flush
+    inserts the whole tree and fills in the foreign keys.
+    """
+
+    return models.Meal(
+        user_id=user_id,
+        name=meal_in.name,
+        date=date,
+        items=[
+            models.MealItem(
+                name=item.name,
+                quantity=item.quantity,
+                notes=item.notes,
+                food_entries=[
+                    models.FoodEntry(
+                        calories=item.nutrition.calories,
+                        protein=item.nutrition.protein,
+                        carbs=item.nutrition.carbs,
+                        fat=item.nutrition.fat,
+                    )
+                ],
+            )
+            for item in meal_in.items
+        ],
+    )
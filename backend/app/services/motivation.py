@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import datetime as dt
+import hashlib
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional
+from typing import Optional, Tuple
 
 from sqlalchemy.orm import Session
 
@@ -36,16 +37,28 @@ class MotivationMessageService:
 
     CALORIE_MARGIN = 200
     LOGGING_STREAK_MILESTONES = (3, 7, 14, 30)
+    # One day past the longest milestone so a 31+ day streak never reads as 30.
+    STREAK_LOOKBACK_DAYS = max(LOGGING_STREAK_MILESTONES) + 1
 
     def __init__(self, db: Session):
         self.db = db
 
     def apply(self, user: models.User, summary: models.DailySummary) -> MessagePayload:
-        """Determine and persist the motivation message for *summary*."""
+        """Determine and persist the motivation message for *summary*.
+
+        Selection is skipped, and nothing is written, when the inputs match
+        the fingerprint stored with the current message.
+        """
+
+        latest, previous = self._recent_weight_logs(user, summary.date)
+        streak = self._calculate_logging_streak(user, summary.date)
+        fingerprint = self._fingerprint(user, summary, latest, previous, streak)
+        if summary.message_fingerprint == fingerprint and summary.message_trigger:
+            return self._stored_message(summary)
 
         message = (
-            self._weight_update_message(user, summary)
-            or self._logging_streak_message(user, summary)
+            self._weight_update_message(latest, previous)
+            or self._logging_streak_message(summary, streak)
             or self._calorie_balance_message(user, summary)
             or self._on_target_message(user, summary)
         )
@@ -55,6 +68,7 @@ class MotivationMessageService:
         summary.message_push = message.push
         summary.message_email_subject = message.email_subject
         summary.message_email_body = message.email_body
+        summary.message_fingerprint = fingerprint
         return message
 
     # ------------------------------------------------------------------
@@ -106,9 +120,8 @@ class MotivationMessageService:
         return None
 
     def _logging_streak_message(
-        self, user: models.User, summary: models.DailySummary
+        self, summary: models.DailySummary, streak: int
     ) -> Optional[MessagePayload]:
-        streak = self._calculate_logging_streak(user, summary.date)
         if streak in self.LOGGING_STREAK_MILESTONES:
             return MessagePayload(
                 trigger=MessageTrigger.LOGGING_STREAK,
@@ -128,30 +141,11 @@ class MotivationMessageService:
         return None
 
     def _weight_update_message(
-        self, user: models.User, summary: models.DailySummary
+        self, latest: Optional[models.WeightLog], previous: Optional[models.WeightLog]
     ) -> Optional[MessagePayload]:
-        latest = (
-            self.db.query(models.WeightLog)
-            .filter(
-                models.WeightLog.user_id == user.id,
-                models.WeightLog.date == summary.date,
-            )
-            .order_by(models.WeightLog.created_at.desc())
-            .first()
-        )
         if latest is None:
             return None
 
-        previous = (
-            self.db.query(models.WeightLog)
-            .filter(
-                models.WeightLog.user_id == user.id,
-                models.WeightLog.date < latest.date,
-            )
-            .order_by(models.WeightLog.date.desc(), models.WeightLog.created_at.desc())
-            .first()
-        )
-
         if previous is None:
             body = (
                 "Hi there,\n\n"
@@ -216,20 +210,72 @@ class MotivationMessageService:
     # ------------------------------------------------------------------
     # Utility helpers
 
+    def _recent_weight_logs(
+        self, user: models.User, date: dt.date
+    ) -> Tuple[Optional[models.WeightLog], Optional[models.WeightLog]]:
+        """Weight log for *date* and the one before it, fetched together."""
+
+        logs = (
+            self.db.query(models.WeightLog)
+            .filter(models.WeightLog.user_id == user.id, models.WeightLog.date <= date)
+            .order_by(models.WeightLog.date.desc(), models.WeightLog.created_at.desc())
+            .limit(2)
+            .all()
+        )
+        if not logs or logs[0].date != date:
+            return None, None
+        previous = logs[1] if len(logs) > 1 else None
+        return logs[0], previous
+
+    @staticmethod
+    def _fingerprint(
+        user: models.User,
+        summary: models.DailySummary,
+        latest: Optional[models.WeightLog],
+        previous: Optional[models.WeightLog],
+        streak: int,
+    ) -> str:
+        # Only calories, the target, the weight logs and the streak feed the copy.
+        parts = [
+            summary.date.isoformat(),
+            f"{summary.total_calories:.6f}",
+            str(user.daily_calorie_target),
+            str(streak),
+        ]
+        for log in (latest, previous):
+            parts.append(f"{log.id}:{log.weight_kg}" if log is not None else "-")
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _stored_message(summary: models.DailySummary) -> MessagePayload:
+        return MessagePayload(
+            trigger=MessageTrigger(summary.message_trigger),
+            in_app=summary.motivation_message,
+            push=summary.message_push,
+            email_subject=summary.message_email_subject,
+            email_body=summary.message_email_body,
+        )
+
     def _calculate_logging_streak(self, user: models.User, date: dt.date) -> int:
+        """Consecutive logged days ending at *date*, capped at ``STREAK_LOOKBACK_DAYS``.
+
+        Only milestone lengths matter, so one bounded query over recent
+        summaries replaces walking backwards a day at a time.
+        """
+
+        window_start = date - dt.timedelta(days=self.STREAK_LOOKBACK_DAYS - 1)
+        logged_days = {
+            row.date
+            for row in self.db.query(models.DailySummary.date).filter(
+                models.DailySummary.user_id == user.id,
+                models.DailySummary.date >= window_start,
+                models.DailySummary.date <= date,
+                models.DailySummary.total_calories > 0,
+            )
+        }
         streak = 0
         current = date
-        while True:
-            summary = (
-                self.db.query(models.DailySummary)
-                .filter(
-                    models.DailySummary.user_id == user.id,
-                    models.DailySummary.date == current,
-                )
-                .first()
-            )
-            if summary is None or summary.total_calories <= 0:
-                break
+        while current in logged_days:
             streak += 1
             current -= dt.timedelta(days=1)
         return streak
@@ -0,0 +1,171 @@
+"""Password hashing on a dedicated process pool.
+
+bcrypt is deliberately slow and holds the GIL for most of its run, so a
+burst of logins on the default thread pool stalls every other request of
+the process. Hashes and verifications run here instead, on a small
+process pool of their own. An asyncio semaphore caps how many calls are
+submitted at once; callers beyond it wait on the event loop, not on a
+thread or a database connection.
+
+Every (spawned) worker process imports this module again. Apart from
+passlib it only imports ``app.config``, which reads environment variables
+and has no other side effects; keep database, service and other
+application imports out of it, or each worker loads them for nothing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Optional
+
+from passlib.context import CryptContext
+
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(
+    schemes=["bcrypt", "bcrypt_sha256"],
+    deprecated="auto",
+    bcrypt_sha256__deprecated=True,
+)
+
+# Waiting longer than this for a free slot is logged as a warning.
+SLOW_WAIT_SECONDS = 1.0
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    return pwd_context.verify(password, password_hash)
+
+
+@dataclass
+class HashingStats:
+    in_flight: int = 0
+    waiting: int = 0
+    completed: int = 0
+    failed: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    total_run_seconds: float = 0.0
+
+
+class PasswordHasher:
+    """Bounded process pool for bcrypt with queue metrics."""
+
+    def __init__(self, workers: int, max_concurrency: int):
+        self.workers = max(1, workers)
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._stats = HashingStats()
+        self._lock = threading.Lock()
+        self._logged_finished = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process with open database connections and
+                # running threads is not safe.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run(self, func: Callable, *args):
+        semaphore = self._get_semaphore()
+        queued_at = time.perf_counter()
+        self._stats.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._stats.waiting -= 1
+
+        started_at = time.perf_counter()
+        waited = started_at - queued_at
+        self._stats.in_flight += 1
+        self._stats.total_wait_seconds += waited
+        self._stats.max_wait_seconds = max(self._stats.max_wait_seconds, waited)
+        if waited > SLOW_WAIT_SECONDS:
+            logger.warning(
+                "Password hashing waited %.2fs for a slot (%d in flight, %d waiting)",
+                waited,
+                self._stats.in_flight,
+                self._stats.waiting,
+            )
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), func, *args)
+        except BaseException:
+            self._stats.failed += 1
+            raise
+        else:
+            self._stats.completed += 1
+            return result
+        finally:
+            self._stats.in_flight -= 1
+            self._stats.total_run_seconds += time.perf_counter() - started_at
+            semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(_verify, password, password_hash)
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth, totals and average wait/run times in milliseconds."""
+
+        snapshot = asdict(self._stats)
+        finished = self._stats.completed + self._stats.failed
+        snapshot["avg_wait_ms"] = self._stats.total_wait_seconds * 1000 / finished if finished else 0.0
+        snapshot["avg_run_ms"] = self._stats.total_run_seconds * 1000 / finished if finished else 0.0
+        snapshot["max_wait_ms"] = self._stats.max_wait_seconds * 1000
+        for key in ("total_wait_seconds", "max_wait_seconds", "total_run_seconds"):
+            del snapshot[key]
+        return snapshot
+
+    def log_stats(self) -> None:
+        """Log :meth:`stats` if any call finished since the last log line."""
+
+        stats = self.stats()
+        finished = stats["completed"] + stats["failed"]
+        if finished == self._logged_finished:
+            return
+        self._logged_finished = finished
+        logger.info(
+            "Password hashing: %(completed)d completed, %(failed)d failed, %(in_flight)d in flight, "
+            "%(waiting)d waiting; wait avg %(avg_wait_ms).1f ms, max %(max_wait_ms).1f ms; run avg %(avg_run_ms).1f ms",
+            stats,
+        )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(config.PASSWORD_HASH_WORKERS, config.PASSWORD_HASH_MAX_CONCURRENCY)
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    return await password_hasher.verify(password, password_hash)
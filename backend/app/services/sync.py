@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import datetime as dt
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session, selectinload
+
+from .. import models, schemas
+from .daily_summary import DailySummaryService
+from .exercise_db import estimate_workout_calories
+from .meals import build_meal
+
+MAX_SYNC_OPERATIONS = 500
+
+
+class SyncOperationError(Exception):
+    """An operation that cannot be applied; reported in its result, the batch continues."""
+
+
+class SyncService:
+    """Apply an ordered batch of offline changes in the caller's transaction.
+
+    Every operation is checked before it touches the session, so a failed
+    operation leaves nothing behind and the rest of the batch still
+    applies. Applied ``op_id``s are recorded in ``sync_operations``;
+    replaying one returns ``duplicate`` with the original entity id.
+    Daily summaries are recalculated once per affected date at the end
+    instead of after every operation.
+    """
+
+    def __init__(self, db: Session, user: models.User):
+        self.db = db
+        self.user = user
+        self._entity_ids: Dict[str, Optional[int]] = {}
+        self._summary_dates: Set[dt.date] = set()
+        self._weight_dates: Set[dt.date] = set()
+        self._handlers: Dict[str, Callable[[schemas.SyncOperationIn], Optional[int]]] = {
+            "meal.create": self._create_meal,
+            "meal.update": self._update_meal,
+            "meal.delete": self._delete_meal,
+            "meal_item.update": self._update_meal_item,
+            "meal_item.delete": self._delete_meal_item,
+            "workout.create": self._create_workout,
+            "workout.delete": self._delete_workout,
+            "weight.upsert": self._upsert_weight,
+            "weight.delete": self._delete_weight,
+        }
+
+    def apply(self, operations: List[schemas.SyncOperationIn]) -> schemas.SyncResponse:
+        self._load_applied(operations)
+
+        results: List[schemas.SyncOperationResult] = []
+        for operation in operations:
+            if operation.op_id in self._entity_ids:
+                results.append(
+                    schemas.SyncOperationResult(
+                        op_id=operation.op_id,
+                        status="duplicate",
+                        entity_id=self._entity_ids[operation.op_id],
+                    )
+                )
+                continue
+            try:
+                entity_id = self._handlers[operation.type](operation)
+            except SyncOperationError as exc:
+                results.append(
+                    schemas.SyncOperationResult(op_id=operation.op_id, status="error", error=str(exc))
+                )
+                continue
+
+            self.db.add(
+                models.SyncOperation(
+                    user_id=self.user.id,
+                    op_id=operation.op_id,
+                    op_type=operation.type,
+                    entity_id=entity_id,
+                )
+            )
+            self.db.flush()
+            self._entity_ids[operation.op_id] = entity_id
+            results.append(
+                schemas.SyncOperationResult(op_id=operation.op_id, status="applied", entity_id=entity_id)
+            )
+
+        return schemas.SyncResponse(results=results, summaries=self._refresh_summaries())
+
+    # ------------------------------------------------------------------
+    # Batch bookkeeping
+
+    def _load_applied(self, operations: List[schemas.SyncOperationIn]) -> None:
+        """Fetch previously applied ids for every op_id the batch mentions, in one query."""
+
+        op_ids = {operation.op_id for operation in operations}
+        op_ids.update(operation.target_op_id for operation in operations if operation.target_op_id)
+        if not op_ids:
+            return
+        rows = (
+            self.db.query(models.SyncOperation.op_id, models.SyncOperation.entity_id)
+            .filter(
+                models.SyncOperation.user_id == self.user.id,
+                models.SyncOperation.op_id.in_(op_ids),
+            )
+            .all()
+        )
+        self._entity_ids.update({op_id: entity_id for op_id, entity_id in rows})
+
+    def _refresh_summaries(self) -> List[models.DailySummary]:
+        service = DailySummaryService(self.db)
+        summaries = [service.recalculate(self.user, date) for date in sorted(self._summary_dates)]
+        # Recalculated summaries already have a fresh message.
+        for date in sorted(self._weight_message_dates() - self._summary_dates):
+            service.refresh_message(self.user, date)
+        return summaries
+
+    def _weight_message_dates(self) -> Set[dt.date]:
+        """Summary dates whose weight-change message a changed weight log feeds.
+
+        A summary's message compares the weight log of its own date with
+        the one before it, so a change on a date affects that date and the
+        next date that has a weight log.
+        """
+
+        dates = set(self._weight_dates)
+        for date in self._weight_dates:
+            following = (
+                self.db.query(models.WeightLog.date)
+                .filter(models.WeightLog.user_id == self.user.id, models.WeightLog.date > date)
+                .order_by(models.WeightLog.date)
+                .limit(1)
+                .scalar()
+            )
+            if following is not None:
+                dates.add(following)
+        return dates
+
+    # ------------------------------------------------------------------
+    # Lookups
+
+    def _target_id(self, operation: schemas.SyncOperationIn) -> int:
+        if operation.target_id is not None:
+            return operation.target_id
+        if operation.target_op_id is None:
+            raise SyncOperationError("target_id or target_op_id is required")
+        entity_id = self._entity_ids.get(operation.target_op_id)
+        if entity_id is None:
+            raise SyncOperationError(f"Unknown target_op_id {operation.target_op_id!r}")
+        return entity_id
+
+    def _meal(self, operation: schemas.SyncOperationIn) -> models.Meal:
+        meal = (
+            self.db.query(models.Meal)
+            .options(selectinload(models.Meal.items).selectinload(models.MealItem.food_entries))
+            .filter(models.Meal.id == self._target_id(operation), models.Meal.user_id == self.user.id)
+            .first()
+        )
+        if meal is None:
+            raise SyncOperationError("Meal not found")
+        return meal
+
+    def _meal_item(self, operation: schemas.SyncOperationIn) -> Tuple[models.Meal, models.MealItem]:
+        meal = self._meal(operation)
+        for item in meal.items:
+            if item.id == operation.item_id:
+                return meal, item
+        raise SyncOperationError("Meal item not found")
+
+    def _check_meal_name_free(self, name: str, date: dt.date, exclude_id: Optional[int] = None) -> None:
+        query = self.db.query(models.Meal.id).filter(
+            models.Meal.user_id == self.user.id,
+            models.Meal.date == date,
+            models.Meal.name == name,
+        )
+        if exclude_id is not None:
+            query = query.filter(models.Meal.id != exclude_id)
+        if query.first() is not None:
+            raise SyncOperationError(f"A meal named {name!r} already exists on {date.isoformat()}")
+
+    @staticmethod
+    def _parse(schema, operation: schemas.SyncOperationIn):
+        try:
+            return schema.parse_obj(operation.data)
+        except ValidationError as exc:
+            raise SyncOperationError(f"Invalid data: {exc.errors()}") from exc
+
+    # ------------------------------------------------------------------
+    # Operations (each returns the affected entity id)
+
+    def _create_meal(self, operation: schemas.SyncOperationIn) -> int:
+        meal_in = self._parse(schemas.MealCreate, operation)
+        meal_date = meal_in.date or dt.date.today()
+        self._check_meal_name_free(meal_in.name, meal_date)
+        meal = build_meal(meal_in, self.user.id, meal_date)
+        self.db.add(meal)
+        self.db.flush()
+        self._summary_dates.add(meal_date)
+        return meal.id
+
+    def _update_meal(self, operation: schemas.SyncOperationIn) -> int:
+        meal_update = self._parse(schemas.MealUpdate, operation)
+        meal = self._meal(operation)
+        new_name = meal_update.name if meal_update.name is not None else meal.name
+        new_date = meal_update.date if meal_update.date is not None else meal.date
+        self._check_meal_name_free(new_name, new_date, exclude_id=meal.id)
+
+        if new_date != meal.date:
+            self._summary_dates.update({meal.date, new_date})
+        meal.name = new_name
+        meal.date = new_date
+        self.db.flush()
+        return meal.id
+
+    def _delete_meal(self, operation: schemas.SyncOperationIn) -> int:
+        meal = self._meal(operation)
+        self._summary_dates.add(meal.date)
+        self.db.delete(meal)
+        self.db.flush()
+        return meal.id
+
+    def _update_meal_item(self, operation: schemas.SyncOperationIn) -> int:
+        item_update = self._parse(schemas.MealItemUpdate, operation)
+        _, meal_item = self._meal_item(operation)
+        if item_update.name is not None:
+            meal_item.name = item_update.name
+        if item_update.quantity is not None:
+            meal_item.quantity = item_update.quantity
+        self.db.flush()
+        return meal_item.id
+
+    def _delete_meal_item(self, operation: schemas.SyncOperationIn) -> int:
+        meal, meal_item = self._meal_item(operation)
+        self._summary_dates.add(meal.date)
+        self.db.delete(meal_item)
+        self.db.flush()
+        return meal_item.id
+
+    def _create_workout(self, operation: schemas.SyncOperationIn) -> int:
+        workout_in = self._parse(schemas.WorkoutLogCreate, operation)
+        calories_burned = workout_in.calories_burned
+        if calories_burned is None:
+            calories_burned = estimate_workout_calories(
+                workout_in.activity_type, workout_in.duration_minutes, self.user.weight_kg
+            )
+        workout = models.WorkoutLog(
+            user_id=self.user.id,
+            date=workout_in.date or dt.date.today(),
+            activity_type=workout_in.activity_type,
+            duration_minutes=workout_in.duration_minutes,
+            calories_burned=calories_burned,
+            distance_km=workout_in.distance_km,
+            notes=workout_in.notes,
+        )
+        self.db.add(workout)
+        self.db.flush()
+        return workout.id
+
+    def _delete_workout(self, operation: schemas.SyncOperationIn) -> int:
+        workout = (
+            self.db.query(models.WorkoutLog)
+            .filter(
+                models.WorkoutLog.id == self._target_id(operation),
+                models.WorkoutLog.user_id == self.user.id,
+            )
+            .first()
+        )
+        if workout is None:
+            raise SyncOperationError("Workout not found")
+        self.db.delete(workout)
+        self.db.flush()
+        return workout.id
+
+    def _upsert_weight(self, operation: schemas.SyncOperationIn) -> int:
+        weight_in = self._parse(schemas.WeightLogUpsert, operation)
+        log_date = weight_in.date or dt.date.today()
+        # One weight log per day (uq_weight_user_date): a second entry replaces the first.
+        weight_log = (
+            self.db.query(models.WeightLog)
+            .filter(models.WeightLog.user_id == self.user.id, models.WeightLog.date == log_date)
+            .first()
+        )
+        if weight_log is None:
+            weight_log = models.WeightLog(user_id=self.user.id, date=log_date, weight_kg=weight_in.weight_kg)
+            self.db.add(weight_log)
+        else:
+            weight_log.weight_kg = weight_in.weight_kg
+        self.db.flush()
+        self._weight_dates.add(log_date)
+        return weight_log.id
+
+    def _delete_weight(self, operation: schemas.SyncOperationIn) -> int:
+        weight_log = (
+            self.db.query(models.WeightLog)
+            .filter(
+                models.WeightLog.id == self._target_id(operation),
+                models.WeightLog.user_id == self.user.id,
+            )
+            .first()
+        )
+        if weight_log is None:
+            raise SyncOperationError("Weight log not found")
+        self.db.delete(weight_log)
+        self.db.flush()
+        self._weight_dates.add(weight_log.date)
+        return weight_log.id
@@ -0,0 +1,141 @@
+"""Streaming image uploads.
+
+Uploads are copied to disk chunk by chunk, with file I/O on the thread
+pool, so a large image neither blocks the event loop nor sits in memory
+whole. The size limit is enforced while copying. The file type comes
+from the first bytes (JPEG/PNG signatures), not the client's file name,
+and picks the stored extension.
+
+:class:`UploadSizeLimitMiddleware` caps the request body itself. Starlette
+spools a whole multipart body before the handler runs, and a chunked
+request has no Content-Length, so the bytes are counted as the server
+hands them over and the request is aborted with 413 once past the cap.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Collection, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+JPEG_SIGNATURE = b"\xff\xd8\xff"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class UploadError(Exception):
+    """An upload that is rejected; nothing is left on disk."""
+
+
+class UploadTooLarge(UploadError):
+    pass
+
+
+class UnsupportedImageType(UploadError):
+    pass
+
+
+def sniff_image_extension(head: bytes) -> Optional[str]:
+    if head.startswith(JPEG_SIGNATURE):
+        return ".jpg"
+    if head.startswith(PNG_SIGNATURE):
+        return ".png"
+    return None
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def too_large_message(max_bytes: int) -> str:
+    return f"Image is larger than {round(max_bytes / (1024 * 1024), 1):g} MB"
+
+
+async def save_image_upload(
+    upload: UploadFile, directory: str, stem: str, max_bytes: int, chunk_bytes: int
+) -> str:
+    """Stream *upload* to ``directory/<stem>.<ext>`` and return the file name.
+
+    Raises :class:`UnsupportedImageType` unless it is a JPEG or PNG and
+    :class:`UploadTooLarge` once more than *max_bytes* have been read.
+    """
+
+    head = await upload.read(chunk_bytes)
+    extension = sniff_image_extension(head)
+    if extension is None:
+        raise UnsupportedImageType("Only JPEG and PNG images are allowed")
+
+    filename = f"{stem}{extension}"
+    final_path = os.path.join(directory, filename)
+    # Written under a hidden name and renamed when complete, so /uploads never serves a partial file.
+    partial_path = os.path.join(directory, f".{filename}.part")
+    out = await run_in_threadpool(open, partial_path, "wb")
+    try:
+        size = 0
+        chunk = head
+        while chunk:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(too_large_message(max_bytes))
+            await run_in_threadpool(out.write, chunk)
+            chunk = await upload.read(chunk_bytes)
+        await run_in_threadpool(out.close)
+        await run_in_threadpool(os.replace, partial_path, final_path)
+    except BaseException:
+        await run_in_threadpool(out.close)
+        await run_in_threadpool(_remove_quietly, partial_path)
+        raise
+    return filename
+
+
+class UploadSizeLimitMiddleware:
+    """Reject request bodies to *paths* larger than *max_bytes* plus *overhead_bytes*.
+
+    *overhead_bytes* leaves room for multipart boundaries, part headers and
+    other form fields around the file itself.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Collection[str], max_bytes: int, overhead_bytes: int):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = max_bytes
+        self.limit = max_bytes + overhead_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.limit:
+            response = JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": too_large_message(self.max_bytes)},
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    # Raised while the body is being parsed; FastAPI passes
+                    # HTTPException through and the exception handler answers 413.
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=too_large_message(self.max_bytes),
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
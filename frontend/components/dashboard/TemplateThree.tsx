@@ -1,7 +1,7 @@
 "use client";
 
 import { useCallback, useEffect, useMemo, useState } from "react";
-import { DashboardData, BodyFatAnalysis, BodyFatProjection, analyzeBodyFat, getBodyFatAnalyses, getBodyFatProjections } from "@/lib/api";
+import { DashboardData, BodyFatAnalysis, BodyFatProjection, analyzeBodyFat, getBodyFatAnalyses, getBodyFatProjections, waitForBodyFatAnalysis } from "@/lib/api";
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_BASE_URL ?? "http://localhost:8000";
 
@@ -207,9 +207,13 @@ export default function TemplateThree({ data, onRefresh }: TemplateThreeProps) {
     setIsUploading(true);
     setError(null);
     try {
-      const analysis = await analyzeBodyFat(file);
+      const pending = await analyzeBodyFat(file);
+      const analysis = await waitForBodyFatAnalysis(pending.id);
       await loadAnalyses();
       setSelectedAnalysis(analysis);
+      if (analysis.status === "failed") {
+        setError(analysis.error_message ?? "Failed to analyze image");
+      }
     } catch (err) {
       setError(err instanceof Error ? err.message : "Failed to analyze image");
     } finally {
@@ -374,6 +374,8 @@ export interface BodyFatAnalysis {
   image_path: string;
   body_fat_percentage: number | null;
   percentile_rank: number | null;
+  status: "pending" | "completed" | "failed";
+  error_message: string | null;
   created_at: string;
 }
 
@@ -420,6 +422,26 @@ export async function getBodyFatAnalyses(): Promise<BodyFatAnalysis[]> {
   return request<BodyFatAnalysis[]>("/body-fat/analyses");
 }
 
+export async function getBodyFatAnalysis(analysisId: number): Promise<BodyFatAnalysis> {
+  return request<BodyFatAnalysis>(`/body-fat/analyses/${analysisId}`);
+}
+
+// 분석은 백그라운드에서 진행되므로 pending이 끝날 때까지 폴링
+export async function waitForBodyFatAnalysis(
+  analysisId: number,
+  intervalMs = 1000,
+  timeoutMs = 60000
+): Promise<BodyFatAnalysis> {
+  const deadline = Date.now() + timeoutMs;
+  for (;;) {
+    const analysis = await getBodyFatAnalysis(analysisId);
+    if (analysis.status !== "pending" || Date.now() >= deadline) {
+      return analysis;
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
 export async function getBodyFatProjections(analysisId: number): Promise<BodyFatProjection[]> {
   return request<BodyFatProjection[]>(`/body-fat/projections/${analysisId}`);
 }